@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from pathlib import Path
+
+import brotli
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import FileResponse
+
+from app.config import settings
+
+# Сжимаются только текстовые форматы; картинки уже сжаты
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".webmanifest", ".html", ".txt"}
+
+# Предпочтение кодировок при согласовании с Accept-Encoding
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _write_atomic(path: Path, data: bytes):
+    # Несколько воркеров могут собирать ассеты одновременно
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class AssetManifest:
+    """
+    Сборка статики при старте: каждому файлу из source_dir даётся имя
+    с хэшем содержимого (css/styles.3f2a9c1d04.css), рядом пишутся
+    .gz и .br-варианты. Манифест сопоставляет исходный путь и путь с хэшем.
+    """
+
+    def __init__(self, source_dir: str, build_dir: str):
+        self.source_dir = Path(source_dir)
+        self.build_dir = Path(build_dir)
+        self.paths: dict[str, str] = {}
+        self._sources: dict[str, str] = {}
+
+    def build(self):
+        paths = {}
+        for source in sorted(self.source_dir.rglob("*")):
+            if not source.is_file():
+                continue
+            data = source.read_bytes()
+            relative = source.relative_to(self.source_dir)
+            digest = hashlib.sha256(data).hexdigest()[:10]
+            hashed = relative.with_name(f"{relative.stem}.{digest}{relative.suffix}").as_posix()
+            paths[relative.as_posix()] = hashed
+
+            target = self.build_dir / hashed
+            if target.exists():
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if relative.suffix in COMPRESSIBLE_SUFFIXES:
+                gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(gzipped) < len(data):
+                    _write_atomic(target.with_name(target.name + ".gz"), gzipped)
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    _write_atomic(target.with_name(target.name + ".br"), compressed)
+            # Основной файл пишется последним: его наличие означает, что варианты готовы
+            _write_atomic(target, data)
+
+        _write_atomic(self.build_dir / "manifest.json", json.dumps(paths, indent=2).encode())
+        self.paths = paths
+        self._sources = {hashed: original for original, hashed in paths.items()}
+
+    def url(self, path: str) -> str:
+        return f"/static/{self.paths.get(path, path)}"
+
+    def source_for(self, hashed_path: str) -> str | None:
+        return self._sources.get(hashed_path)
+
+
+asset_manifest = AssetManifest(source_dir="app/static", build_dir=settings.STATIC_BUILD_DIR)
+
+
+def static_url(path: str) -> str:
+    """
+    URL статического файла для шаблонов: с хэшем, если манифест собран.
+    """
+    return asset_manifest.url(path)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    Файлы с хэшем в имени отдаются из каталога сборки с immutable-кэшированием
+    и предсжатым вариантом по Accept-Encoding. Остальные пути обслуживаются
+    как обычная статика.
+    """
+
+    IMMUTABLE = "public, max-age=31536000, immutable"
+
+    def __init__(self, *args, manifest: AssetManifest = asset_manifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope):
+        hashed_path = Path(path).as_posix()
+        original = self.manifest.source_for(hashed_path)
+        if original is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        target = self.manifest.build_dir / hashed_path
+        media_type = mimetypes.guess_type(original)[0] or "application/octet-stream"
+        headers = {"Cache-Control": self.IMMUTABLE, "Vary": "Accept-Encoding"}
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        accepted = {value.split(";")[0].strip() for value in accept_encoding.split(",")}
+        for encoding, suffix in ENCODINGS:
+            variant = target.with_name(target.name + suffix)
+            if encoding in accepted and variant.exists():
+                headers["Content-Encoding"] = encoding
+                return FileResponse(variant, headers=headers, media_type=media_type)
+        return FileResponse(target, headers=headers, media_type=media_type)
@@ -0,0 +1,159 @@
+import zlib
+
+import brotli
+
+from app.config import settings
+
+COMPRESSIBLE_TYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "application/manifest+json",
+    "image/svg+xml",
+}
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31: формат gzip (заголовок и контрольная сумма)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # SYNC_FLUSH отдаёт клиенту всё сжатое к этому моменту
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    accepted = set()
+    for value in accept_encoding.split(","):
+        name, _, params = value.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip().lower())
+    if "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов gzip или brotli (по Accept-Encoding) для типов из
+    COMPRESSIBLE_TYPES. Ответ целиком меньше minimum_size не сжимается.
+    Потоковые ответы сжимаются по частям, без накопления в памяти.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = settings.COMPRESSION_MIN_SIZE,
+        gzip_level: int = settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = settings.COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoder(self, encoding: str):
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = _choose_encoding(accept_encoding)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = {name.lower(): value for name, value in message["headers"]}
+                content_type = headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip()
+                passthrough = (
+                    message["status"] in (204, 206, 304)
+                    # Диапазон (Range) относится к несжатому телу
+                    or b"content-range" in headers
+                    or b"content-encoding" in headers
+                    or content_type not in COMPRESSIBLE_TYPES
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None and not more_body:
+                # Ответ пришёл целиком: сжимаем сразу и знаем итоговую длину
+                passthrough = True
+                if len(body) < self.minimum_size:
+                    await send(start)
+                    await send(message)
+                    return
+                compressed = self._encoder(encoding).finish(body)
+                await send(self._compressed_start(start, encoding, content_length=len(compressed)))
+                await send({"type": "http.response.body", "body": compressed})
+                return
+            if encoder is None:
+                encoder = self._encoder(encoding)
+                await send(self._compressed_start(start, encoding))
+            if more_body:
+                data = encoder.chunk(body)
+                if data:
+                    await send({"type": "http.response.body", "body": data, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": encoder.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressed_start(self, start: dict, encoding: str, content_length: int | None = None) -> dict:
+        headers = []
+        vary = b"Accept-Encoding"
+        for name, value in start["headers"]:
+            lowered = name.lower()
+            if lowered == b"content-length":
+                continue
+            if lowered == b"vary":
+                vary = value + b", Accept-Encoding"
+                continue
+            if lowered == b"etag" and not value.startswith(b"W/"):
+                # Сжатое представление отличается побайтно: ETag становится слабым
+                value = b"W/" + value
+            headers.append((name, value))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", vary))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        return {**start, "headers": headers}
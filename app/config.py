@@ -12,6 +12,54 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     DATABASE_URL: str | None = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # DSN реплик для чтения (JSON-список postgresql+asyncpg://...); пусто — всё через primary
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_MAX_LAG: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL: float = 5.0
+    # Сколько секунд после записи запросы пользователя читают с primary
+    DB_REPLICA_STICKY_SECONDS: int = 10
+    STATISTICS_CACHE_TTL: int = 60
+    RESPONSE_CACHE_SIZE: int = 1000
+    RESPONSE_CACHE_TTL: int = 300
+    STATIC_BUILD_DIR: str = "app/static_build"
+    COMPRESSION_MIN_SIZE: int = 500
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    TEMPLATE_BYTECODE_DIR: str = "app/templates_cache"
+    FRAGMENT_CACHE_SIZE: int = 500
+    FRAGMENT_CACHE_TTL: int = 300
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 60
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASHING_WORKERS: int = 4
+    SEARCH_BACKEND: str = "auto"  # auto | postgres | memory
+    SEARCH_INDEX_TTL: int = 300
+    NEARBY_INDEX_TTL: int = 300
+    NEARBY_CELL_DEGREES: float = 1.0
+    RECOMMENDATIONS_TRIP_WEIGHT: float = 3.0
+    RECOMMENDATIONS_REFRESH_INTERVAL: int = 30
+    RECOMMENDATIONS_REBUILD_INTERVAL: int = 3600
+    SIMILARITY_INDEX_DIR: str = "app/similarity_index"
+    SIMILARITY_TOP_K: int = 20
+    POPULARITY_REFRESH_INTERVAL: int = 600
+    POPULARITY_HALF_LIFE_DAYS: float = 180
+    POPULARITY_PRIOR_WEIGHT: float = 5.0
+    JOBS_QUEUE_BACKEND: str = "memory"
+    JOBS_WORKERS: int = 2
+    TRIP_STATUS_INTERVAL: int = 60
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | postgres
+    # (запросов, секунд): ёмкость корзины и время её полного восполнения
+    RATE_LIMIT_LOGIN_IP: tuple[int, float] = (20, 60)
+    RATE_LIMIT_LOGIN_EMAIL: tuple[int, float] = (5, 300)
+    RATE_LIMIT_REGISTER_IP: tuple[int, float] = (5, 600)
+    RATE_LIMIT_REGISTER_EMAIL: tuple[int, float] = (3, 3600)
+    RATE_LIMIT_CLEANUP_INTERVAL: int = 600
     
     @model_validator(mode='after')
     def get_database_url(self) -> Any:
@@ -1,57 +1,159 @@
-from sqlalchemy import delete, insert, select, update
-from app.database import async_session_maker
+from typing import AsyncIterator, Iterable, Sequence
+from sqlalchemy import Integer, any_, bindparam, delete, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import session_scope
 from app.users.models import User
 
 class BaseDAO:
+    """
+    Все методы принимают необязательную session: при передаче сессии запроса
+    (зависимость get_uow) вызовы выполняются в её транзакции, без неё каждый
+    вызов открывает собственную сессию, как в скриптах.
+
+    options — опции загрузки связей (selectinload, load_only и т.п.) для
+    конкретного вызова. shape — имя проекции из SHAPES: тогда find_all
+    выбирает только эти колонки и возвращает строки, а не ORM-объекты.
+    Строки отдаются в response_model напрямую (from_attributes), без
+    материализации ORM-объектов.
+    """
     model = None
+    SHAPES: dict[str, tuple] = {}
+
+    @classmethod
+    def _select(cls, shape: str | None = None, options: Sequence = ()):
+        if shape is not None:
+            return select(*cls.SHAPES[shape])
+        return select(cls.model).options(*options)
     
     @classmethod
-    async def find_by_id(cls, model_id):
-        async with async_session_maker() as session:
-            query = select(cls.model).filter_by(id=model_id)
+    async def find_by_id(
+        cls,
+        model_id,
+        session: AsyncSession | None = None,
+        shape: str | None = None,
+        options: Sequence = ()
+    ):
+        async with session_scope(session) as session:
+            query = cls._select(shape, options).filter(cls.model.id == model_id)
             result = await session.execute(query)
-            return result.scalar_one_or_none()
+            return result.one_or_none() if shape else result.scalar_one_or_none()
+    
+    @classmethod
+    async def find_by_ids(
+        cls,
+        model_ids: Iterable[int],
+        session: AsyncSession | None = None,
+        shape: str | None = None
+    ) -> dict:
+        """
+        Записи по списку id одним запросом (WHERE id = ANY(:ids)), в виде {id: запись}.
+        """
+        ids = list(set(model_ids))
+        if not ids:
+            return {}
+        async with session_scope(session) as session:
+            query = cls._select(shape).filter(
+                cls.model.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+            )
+            result = await session.execute(query)
+            return {obj.id: obj for obj in (result.all() if shape else result.scalars().all())}
     
     @classmethod
-    async def find_one_or_none(cls, **filter_by):
-        async with async_session_maker() as session:
-            query = select(cls.model).filter_by(**filter_by)
+    async def find_one_or_none(cls, session: AsyncSession | None = None, options: Sequence = (), **filter_by):
+        async with session_scope(session) as session:
+            query = select(cls.model).options(*options).filter_by(**filter_by)
             result = await session.execute(query)
             return result.scalar_one_or_none()
     
     @classmethod
-    async def find_all(cls, **filter_by):
-        async with async_session_maker() as session:
-            query = select(cls.model).filter_by(**filter_by)
+    async def find_all(
+        cls,
+        session: AsyncSession | None = None,
+        shape: str | None = None,
+        options: Sequence = (),
+        **filter_by
+    ):
+        async with session_scope(session) as session:
+            query = cls._select(shape, options).filter_by(**filter_by)
             result = await session.execute(query)
-            return result.scalars().all()
+            return result.all() if shape else result.scalars().all()
+
+    @classmethod
+    async def find_page(
+        cls,
+        limit: int,
+        offset: int = 0,
+        after_id: int | None = None,
+        session: AsyncSession | None = None,
+        shape: str | None = None,
+        **filter_by
+    ):
+        """
+        Страница записей по возрастанию id. При передаче after_id (id последней
+        записи предыдущей страницы) используется keyset-пагинация, и offset
+        игнорируется.
+        """
+        async with session_scope(session) as session:
+            query = cls._select(shape).filter_by(**filter_by)
+            if after_id is not None:
+                query = query.filter(cls.model.id > after_id)
+            elif offset:
+                query = query.offset(offset)
+            query = query.order_by(cls.model.id).limit(limit)
+            result = await session.execute(query)
+            return result.all() if shape else result.scalars().all()
+
+    @classmethod
+    async def stream(
+        cls,
+        shape: str,
+        session: AsyncSession | None = None,
+        batch_size: int = 1000,
+        **filter_by
+    ) -> AsyncIterator:
+        """
+        Все записи по возрастанию id через серверный курсор: из БД строки
+        приходят пачками по batch_size, и в памяти не больше одной пачки.
+        Отдаются только строки проекции shape: ORM-объекты копились бы в
+        identity map сессии. Курсор держит соединение, пока генератор не
+        дочитан или не закрыт.
+        """
+        async with session_scope(session) as session:
+            query = (
+                cls._select(shape)
+                .filter_by(**filter_by)
+                .order_by(cls.model.id)
+                .execution_options(yield_per=batch_size)
+            )
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                for row in partition:
+                    yield row
         
         
     @classmethod
-    async def add(cls, **data):
-        async with async_session_maker() as session:
+    async def add(cls, session: AsyncSession | None = None, **data):
+        async with session_scope(session, commit=True) as session:
             query = insert(cls.model).values(**data)
             await session.execute(query)
-            await session.commit()
             
             
     @classmethod
-    async def delete(cls, id):
-        async with async_session_maker() as session:
+    async def delete(cls, id, session: AsyncSession | None = None):
+        async with session_scope(session, commit=True) as session:
             query = delete(cls.model).where(cls.model.id == id)
             await session.execute(query)
-            await session.commit()
             
     @classmethod
-    async def delete_many(cls, **filter_by):
-        async with async_session_maker() as session:
+    async def delete_many(cls, session: AsyncSession | None = None, **filter_by):
+        async with session_scope(session, commit=True) as session:
             query = delete(cls.model).filter_by(**filter_by)
             await session.execute(query)
-            await session.commit()
             
     @classmethod
-    async def update(cls, id: int, **data):
-        async with async_session_maker() as session:
+    async def update(cls, id: int, session: AsyncSession | None = None, **data):
+        async with session_scope(session, commit=True) as session:
             query = (
                 update(cls.model)
                 .where(cls.model.id == id)
@@ -59,5 +161,4 @@ class BaseDAO:
                 .returning(cls.model)
             )
             result = await session.execute(query)
-            await session.commit()
-            return result.scalar_one_or_none()
\ No newline at end of file
+            return result.scalar_one_or_none()
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Hashable, Iterable
+
+
+class DataLoader:
+    """
+    Собирает обращения load(id) к одному DAO, сделанные в одном такте
+    цикла событий, и выполняет их одним запросом find_by_ids.
+    Результаты запоминаются на время жизни загрузчика (обычно один запрос).
+    """
+
+    def __init__(self, dao):
+        self.dao = dao
+        self._results: dict[Hashable, asyncio.Future] = {}
+        self._queue: list[Hashable] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> asyncio.Future:
+        future = self._results.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._results[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                loop.call_soon(self._schedule_dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list:
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    def _schedule_dispatch(self):
+        task = asyncio.create_task(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        try:
+            found = await self.dao.find_by_ids(keys)
+        except Exception as e:
+            for key in keys:
+                self._results.pop(key).set_exception(e)
+            return
+        for key in keys:
+            self._results[key].set_result(found.get(key))
+
+
+class Loaders:
+    """
+    Набор DataLoader на один HTTP-запрос: loaders[DestinationDAO].load(id).
+    """
+
+    def __init__(self):
+        self._loaders: dict[type, DataLoader] = {}
+
+    def __getitem__(self, dao) -> DataLoader:
+        loader = self._loaders.get(dao)
+        if loader is None:
+            loader = self._loaders[dao] = DataLoader(dao)
+        return loader
+
+
+def get_loaders() -> Loaders:
+    return Loaders()
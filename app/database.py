@@ -1,16 +1,314 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from fastapi import Depends
+from sqlalchemy import event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """
+    Счётчики пула соединений: время ожидания соединения, занятые
+    соединения и соединения сверх pool_size (overflow).
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.overflow = 0
+        self.peak_overflow = 0
+
+    def record_wait(self, seconds: float):
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def on_checkout(self, pool):
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        self.overflow = max(pool.overflow(), 0)
+        self.peak_overflow = max(self.peak_overflow, self.overflow)
+
+    def on_checkin(self, pool):
+        self.in_use = max(self.in_use - 1, 0)
+        self.overflow = max(pool.overflow(), 0)
+
+    def snapshot(self) -> dict:
+        return {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "overflow": self.overflow,
+            "peak_overflow": self.peak_overflow,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Пул, замеряющий время получения соединения (ожидание в очереди
+    плюс установка нового соединения). Счётчики пишутся в metrics,
+    которые назначает create_instrumented_engine.
+    """
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() заменяет пул новым; счётчики остаются прежними
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
 
+def create_instrumented_engine(url: str, metrics: PoolMetrics):
+    """
+    Движок с настройками пула из settings и InstrumentedAsyncPool,
+    счётчики которого (ожидание, таймауты, overflow) пишутся в metrics.
+    """
+    created = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    created.sync_engine.pool.metrics = metrics
 
+    @event.listens_for(created.sync_engine.pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.on_checkout(created.sync_engine.pool)
 
+    @event.listens_for(created.sync_engine.pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.on_checkin(created.sync_engine.pool)
 
-engine = create_async_engine(settings.DATABASE_URL)
+    return created
+
+
+engine = create_instrumented_engine(settings.DATABASE_URL, pool_metrics)
 
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+
+class ReplicaSet:
+    """
+    Реплики для чтения. Читающая сессия получает следующую по кругу
+    здоровую реплику; реплика выбывает, если проверка не прошла или она
+    отстаёт больше чем на max_lag секунд, и возвращается после успешной
+    проверки. Без здоровых реплик чтение идёт через primary.
+    """
+
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(self, urls: list[str], max_lag: float, check_interval: float):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.metrics = [PoolMetrics() for _ in urls]
+        self.engines = [
+            create_instrumented_engine(url, metrics)
+            for url, metrics in zip(urls, self.metrics)
+        ]
+        self.healthy = [True] * len(self.engines)
+        self.lag: list[float | None] = [None] * len(self.engines)
+        self.reads = [0] * len(self.engines)
+        self.primary_reads = 0
+        self._counter = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self):
+        """
+        Движок для чтения: следующая здоровая реплика или primary.
+        """
+        if not self.engines:
+            return engine
+        healthy = [index for index, ok in enumerate(self.healthy) if ok]
+        if not healthy:
+            self.primary_reads += 1
+            return engine
+        index = healthy[next(self._counter) % len(healthy)]
+        self.reads[index] += 1
+        return self.engines[index]
+
+    async def _check_one(self, index: int):
+        try:
+            async with self.engines[index].connect() as connection:
+                lag = float(await asyncio.wait_for(
+                    connection.scalar(self.LAG_QUERY), timeout=self.check_interval
+                ))
+        except Exception as error:
+            lag, ok = None, False
+            reason = repr(error)
+        else:
+            ok = lag <= self.max_lag
+            reason = f"отставание {lag:.1f} с"
+        if ok != self.healthy[index]:
+            log = logger.info if ok else logger.warning
+            log("Реплика %d %s: %s", index, "вернулась" if ok else "исключена", reason)
+        self.healthy[index], self.lag[index] = ok, lag
+
+    async def check(self):
+        await asyncio.gather(*(self._check_one(index) for index in range(len(self.engines))))
+
+    async def check_forever(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    async def dispose(self):
+        await asyncio.gather(*(replica.dispose() for replica in self.engines))
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {
+                    "healthy": self.healthy[index],
+                    "lag_seconds": self.lag[index],
+                    "reads": self.reads[index],
+                    "pool": self.metrics[index].snapshot(),
+                }
+                for index in range(len(self.engines))
+            ],
+            "primary_fallback_reads": self.primary_reads,
+        }
+
+
+replica_set = ReplicaSet(
+    settings.DB_REPLICA_URLS,
+    max_lag=settings.DB_REPLICA_MAX_LAG,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL,
+)
+
+
+@dataclass
+class _Routing:
+    # Читать с primary до конца запроса (или блока primary_reads)
+    pinned: bool = False
+    # В запросе была запись: ответ продлевает привязку к primary кукой
+    wrote: bool = False
+
+
+_routing: ContextVar[_Routing | None] = ContextVar("db_routing", default=None)
+
+
+def _mark_written():
+    """
+    Запрос закоммитил запись: его дальнейшие чтения идут на primary, а ответ
+    ставит куку, с которой primary читают и следующие запросы пользователя.
+    Так пользователь видит свои изменения. Вне запроса (задания планировщика)
+    маршрутизации нет, и отмечать нечего.
+    """
+    routing = _routing.get()
+    if routing is not None:
+        routing.pinned = routing.wrote = True
+
+
+@contextmanager
+def primary_reads():
+    """
+    Чтения внутри блока идут на primary (например, догрузка данных,
+    изменённых только что закоммиченной транзакцией).
+    """
+    token = _routing.set(_Routing(pinned=True))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+def primary_pinned() -> bool:
+    routing = _routing.get()
+    return routing is not None and routing.pinned
+
+
+def read_engine():
+    return engine if primary_pinned() else replica_set.choose()
+
+
+class ReadAfterWriteMiddleware:
+    """
+    ASGI-middleware маршрутизации чтений: запрос с кукой PIN_COOKIE целиком
+    читает с primary, а ответ на запрос с записью ставит эту куку на
+    DB_REPLICA_STICKY_SECONDS. Без реплик ничего не делает.
+    """
+
+    PIN_COOKIE = "db_primary"
+
+    def __init__(self, app, replicas: ReplicaSet = replica_set):
+        self.app = app
+        self.replicas = replicas
+        self.cookie = (
+            f"{self.PIN_COOKIE}=1; Max-Age={settings.DB_REPLICA_STICKY_SECONDS}; "
+            f"Path=/; HttpOnly; SameSite=Lax"
+        ).encode()
+
+    def _has_pin_cookie(self, scope) -> bool:
+        # Куки могут прийти несколькими заголовками Cookie
+        prefix = f"{self.PIN_COOKIE}=".encode()
+        return any(
+            part.strip().startswith(prefix)
+            for name, value in scope["headers"]
+            if name == b"cookie"
+            for part in value.split(b";")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.replicas.enabled:
+            return await self.app(scope, receive, send)
+        routing = _Routing(pinned=self._has_pin_cookie(scope))
+        token = _routing.set(routing)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and routing.wrote:
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", self.cookie)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _routing.reset(token)
+
 class Base(DeclarativeBase):
     pass
 
@@ -19,4 +317,84 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+async def get_uow(session: AsyncSession = Depends(get_db)):
+    """
+    Unit of work на время запроса: одна сессия, одно соединение и одна
+    транзакция, которая коммитится после успешного обработчика и
+    откатывается при исключении (в том числе HTTPException). Сессия
+    работает с primary; запрос привязывается к primary, только если
+    транзакция что-то записала (см. _track_writes).
+    """
+    async with session.begin():
+        yield session
+
+
+@asynccontextmanager
+async def session_scope(session: AsyncSession | None = None, commit: bool = False):
+    """
+    Сессия для одного вызова DAO. Переданная сессия (unit of work запроса)
+    используется как есть, коммит за ней следит get_uow. Без неё открывается
+    отдельная сессия, которая коммитится при commit=True. Пишущая сессия
+    (commit=True) работает с primary и после коммита привязывает к нему
+    запрос, читающая — с репликой, если запрос не привязан к primary.
+    """
+    if session is not None:
+        if commit:
+            session.sync_session.info["wrote"] = True
+        yield session
+        return
+    if not commit:
+        async with async_session_maker(bind=read_engine()) as own_session:
+            yield own_session
+        return
+    # Вне запроса чтения внутри блока тоже идут на primary, но привязка
+    # не переживает блок и не остаётся в контексте задания
+    with nullcontext() if _routing.get() is not None else primary_reads():
+        async with async_session_maker() as own_session:
+            own_session.sync_session.info["wrote"] = True
+            yield own_session
+            await own_session.commit()
+
+
+def after_commit(session: AsyncSession, callback):
+    """
+    Выполняет callback после коммита транзакции сессии (при откате не выполняет).
+    """
+    session.sync_session.info.setdefault("after_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    for callback in session.info.pop("after_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_commit(session, previous_transaction):
+    session.info.pop("after_commit", None)
+    session.info.pop("wrote", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_writes(session, flush_context):
+    # Изменения ORM-объектов (session.add/delete) без вызова пишущего метода DAO
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed_writes(session):
+    if session.info.pop("wrote", False):
+        _mark_written()
+
+
+async def driver_connection(session: AsyncSession):
+    """
+    Соединение asyncpg, на котором идёт транзакция сессии. Нужно для
+    операций драйвера без аналога в SQLAlchemy (COPY).
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
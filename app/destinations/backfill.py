@@ -0,0 +1,19 @@
+"""
+Пересчёт таблицы destination_stats по текущим данным reviews и trips
+вместе с рейтингом популярности.
+
+Запуск: python -m app.destinations.backfill
+"""
+import asyncio
+
+from app.destinations.dao import DestinationStatsDAO
+from app.destinations.ranking import popularity_ranker
+
+
+async def main():
+    await DestinationStatsDAO.rebuild()
+    await popularity_ranker.refresh()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
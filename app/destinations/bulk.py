@@ -0,0 +1,152 @@
+"""
+Массовый импорт и экспорт направлений в форматах csv и jsonl.
+
+Запуск:
+    python -m app.destinations.bulk import destinations.csv
+    python -m app.destinations.bulk export destinations.jsonl
+    python -m app.destinations.bulk export - --format csv > destinations.csv
+"""
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import json
+import sys
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Iterator
+
+from pydantic import ValidationError
+
+from app.destinations.dao import DestinationDAO
+from app.destinations.schemas import SDestinationCreate
+
+FORMATS = ("csv", "jsonl")
+
+# Сколько строк читается и валидируется в потоке за один раз
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    # Первые MAX_REPORTED_ERRORS ошибок: номер строки файла и описание
+    errors: list[dict] = field(default_factory=list)
+
+    def reject(self, line: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+
+def _read_records(file: BinaryIO, fmt: str) -> Iterator[tuple[int, dict | str]]:
+    """
+    Записи файла по одной: словарь для csv, исходная строка для jsonl
+    (её разбирает сам pydantic).
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                # Пустая ячейка csv означает отсутствие значения
+                yield reader.line_num, {
+                    key: value or None for key, value in record.items() if key is not None
+                }
+        else:
+            for line_num, line in enumerate(text, 1):
+                if line.strip():
+                    yield line_num, line
+    finally:
+        # Файл закрывает его владелец, а не обёртка
+        text.detach()
+
+
+def _format_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, item['loc'])) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+def _validated_rows(file: BinaryIO, fmt: str, report: ImportReport) -> Iterator[tuple]:
+    """
+    Строки для COPY: (номер строки файла, *IMPORT_COLUMNS). Невалидные
+    записи пропускаются и попадают в отчёт.
+    """
+    for line_num, record in _read_records(file, fmt):
+        try:
+            if isinstance(record, str):
+                item = SDestinationCreate.model_validate_json(record)
+            else:
+                item = SDestinationCreate.model_validate(record)
+        except ValidationError as e:
+            report.reject(line_num, _format_error(e))
+            continue
+        yield (
+            line_num,
+            item.name,
+            item.description,
+            item.country,
+            item.climate,
+            Decimal(str(item.approximate_price)),
+            Decimal(str(item.latitude)),
+            Decimal(str(item.longitude)),
+            item.image_url,
+        )
+
+
+async def _in_batches(rows: Iterator[tuple]) -> AsyncIterator[tuple]:
+    """
+    Чтение и валидация идут в потоке пачками по BATCH_SIZE, чтобы большой
+    файл не блокировал цикл событий; в памяти не больше одной пачки.
+    """
+    while batch := await asyncio.to_thread(list, itertools.islice(rows, BATCH_SIZE)):
+        for row in batch:
+            yield row
+
+
+async def import_destinations(file: BinaryIO, fmt: str) -> ImportReport:
+    report = ImportReport()
+    result = await DestinationDAO.bulk_upsert(_in_batches(_validated_rows(file, fmt, report)))
+    for line in result.rejected:
+        report.reject(line, "значение не помещается в колонку таблицы")
+    report.inserted = len(result.inserted)
+    report.updated = len(result.updated)
+    return report
+
+
+async def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Импорт и экспорт направлений")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="путь к файлу или - для stdin/stdout")
+    parser.add_argument("--format", choices=FORMATS, help="по умолчанию по расширению файла")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or Path(args.path).suffix.lstrip(".").lower()
+    if fmt not in FORMATS:
+        parser.error("укажите --format csv или --format jsonl")
+
+    if args.command == "import":
+        if args.path == "-":
+            report = await import_destinations(sys.stdin.buffer, fmt)
+        else:
+            with open(args.path, "rb") as file:
+                report = await import_destinations(file, fmt)
+        print(json.dumps(asdict(report), ensure_ascii=False, indent=2))
+    else:
+        output = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+        try:
+            async for chunk in DestinationDAO.export(fmt):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
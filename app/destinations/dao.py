@@ -1,58 +1,617 @@
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Sequence
 from app.dao.base import BaseDAO
-from app.destinations.models import Destination
-from sqlalchemy import func, or_, select
-from app.database import async_session_maker
+from app.destinations.models import Destination, DestinationStats
+from sqlalchemy import (
+    Column, Float, Integer, MetaData, Numeric, String, Table, Text,
+    cast, delete, func, insert, literal, or_, select, update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import after_commit, driver_connection, session_scope
+from app.destinations.geo import nearby_index
+from app.destinations.search import get_search_backend, memory_search
+from app.recommendations.content import content_index
+from app.response_cache import invalidate_on_commit
 from app.reviews.models import Review
 from app.trips.models import Trip
 
+# Колонки импорта и экспорта, в порядке колонок CSV
+IMPORT_COLUMNS = (
+    "name",
+    "description",
+    "country",
+    "climate",
+    "approximate_price",
+    "latitude",
+    "longitude",
+    "image_url",
+)
+
+# Промежуточная таблица импорта: строки попадают в неё через COPY и затем
+# сливаются с destinations. Отдельная MetaData, чтобы её не видел alembic.
+destinations_import = Table(
+    "destinations_import",
+    MetaData(),
+    Column("line", Integer),
+    *(
+        Column(name, Numeric if isinstance(Destination.__table__.c[name].type, Numeric) else Text)
+        for name in IMPORT_COLUMNS
+    ),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+# Ключ pg_advisory_xact_lock: параллельные импорты сливаются по очереди
+IMPORT_LOCK_KEY = 7_301_017
+
+# Ключ pg_try_advisory_xact_lock: рейтинг популярности пересчитывает один воркер
+POPULARITY_LOCK_KEY = 7_301_022
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class BulkUpsertResult:
+    inserted: list[int]
+    updated: list[int]
+    # Номера строк, не поместившихся в колонки destinations
+    rejected: list[int]
+
+
 class DestinationDAO(BaseDAO):  
     model = Destination
 
+    SHAPES = {
+        # Выпадающие списки
+        "summary": (Destination.id, Destination.name, Destination.country),
+        # Карточки и таблицы: всё, кроме координат и поискового вектора
+        "card": (
+            Destination.id,
+            Destination.name,
+            Destination.country,
+            Destination.climate,
+            Destination.description,
+            Destination.approximate_price,
+            Destination.image_url,
+        ),
+        # Ответы API (SDestination): все колонки, кроме поискового вектора
+        "full": (
+            Destination.id,
+            Destination.name,
+            Destination.description,
+            Destination.country,
+            Destination.climate,
+            Destination.approximate_price,
+            Destination.latitude,
+            Destination.longitude,
+            Destination.image_url,
+        ),
+    }
+
+    @staticmethod
+    def cache_tags(destination_id: int) -> tuple[str, ...]:
+        """
+        Теги закэшированных ответов, в которых присутствует направление.
+        """
+        return ("destinations", "popular", "statistics", f"destination:{destination_id}")
+
+    @staticmethod
+    def _invalidate_indexes_on_commit(session: AsyncSession, *destination_ids: int):
+        """
+        Индексы в памяти процесса (поиск, координаты) перестраиваются, а индекс
+        похожих направлений обновляется для destination_ids после коммита.
+        """
+        after_commit(session, memory_search.invalidate)
+        after_commit(session, nearby_index.invalidate)
+        after_commit(session, lambda: content_index.mark_changed(*destination_ids))
+
     @classmethod
-    async def find_all(cls, **filter_by):
-        async with async_session_maker() as session:
-            query = select(cls.model)
-
-            search_term = filter_by.pop('search', None)  
-            if search_term:
-                query = query.filter(
-                    or_(
-                        cls.model.name.ilike(f"%{search_term}%"),
-                        cls.model.description.ilike(f"%{search_term}%"),
-                        cls.model.country.ilike(f"%{search_term}%"),
-                        cls.model.climate.ilike(f"%{search_term}%") 
-                    )
-                )
-
-            min_budget = filter_by.pop('min_budget', None)
-            max_budget = filter_by.pop('max_budget', None)
-            if min_budget is not None or max_budget is not None:
-                subquery = select(Trip.destination_id, func.avg(Trip.budget).label('avg_budget')).group_by(Trip.destination_id).subquery()
-                query = query.outerjoin(subquery, cls.model.id == subquery.c.destination_id)
-                if min_budget:
-                    query = query.filter(or_(subquery.c.avg_budget >= min_budget, subquery.c.avg_budget.is_(None)))
-                if max_budget:
-                    query = query.filter(or_(subquery.c.avg_budget <= max_budget, subquery.c.avg_budget.is_(None)))
-
-            for attr, value in filter_by.items():
-                if isinstance(value, str):
-                    query = query.filter(getattr(cls.model, attr).ilike(f"%{value}%"))
-                else:
-                    query = query.filter_by(**{attr: value})
+    async def add(cls, session: AsyncSession | None = None, **data) -> int:
+        async with session_scope(session, commit=True) as session:
+            query = insert(cls.model).values(**data).returning(cls.model.id)
+            destination_id = (await session.execute(query)).scalar_one()
+            cls._invalidate_indexes_on_commit(session, destination_id)
+            invalidate_on_commit(session, "destinations")
+            return destination_id
 
+    @classmethod
+    async def update(cls, id: int, session: AsyncSession | None = None, **data):
+        async with session_scope(session, commit=True) as session:
+            cls._invalidate_indexes_on_commit(session, id)
+            invalidate_on_commit(session, *cls.cache_tags(id))
+            return await super().update(id, session=session, **data)
+
+    @classmethod
+    async def delete(cls, id, session: AsyncSession | None = None):
+        async with session_scope(session, commit=True) as session:
+            cls._invalidate_indexes_on_commit(session, id)
+            invalidate_on_commit(session, *cls.cache_tags(id))
+            await super().delete(id, session=session)
+
+    @classmethod
+    async def _filtered_query(cls, shape: str | None = None, options: Sequence = (), **filter_by):
+        query = cls._select(shape, options)
+
+        search_term = filter_by.pop('search', None)  
+        if search_term:
+            # Фильтр и сортировка по релевантности (полнотекстовый индекс или индекс в памяти)
+            backend = await get_search_backend()
+            query = await backend.apply(query, search_term)
+
+        min_budget = filter_by.pop('min_budget', None)
+        max_budget = filter_by.pop('max_budget', None)
+        if min_budget is not None or max_budget is not None:
+            # Средний бюджет берём из предрассчитанной статистики, а не агрегируем trips
+            avg_budget = DestinationStats.budget_sum / func.nullif(DestinationStats.budget_count, 0)
+            query = query.outerjoin(DestinationStats, cls.model.id == DestinationStats.destination_id)
+            if min_budget is not None:
+                query = query.filter(or_(avg_budget >= min_budget, avg_budget.is_(None)))
+            if max_budget is not None:
+                query = query.filter(or_(avg_budget <= max_budget, avg_budget.is_(None)))
+
+        for attr, value in filter_by.items():
+            if isinstance(value, str):
+                query = query.filter(getattr(cls.model, attr).ilike(f"%{value}%"))
+            else:
+                query = query.filter_by(**{attr: value})
+
+        return query
+
+    @classmethod
+    async def find_all(
+        cls,
+        session: AsyncSession | None = None,
+        shape: str | None = None,
+        options: Sequence = (),
+        **filter_by
+    ):
+        async with session_scope(session) as session:
+            query = await cls._filtered_query(shape, options, **filter_by)
             result = await session.execute(query)
-            return result.scalars().all()
+            return result.all() if shape else result.scalars().all()
+
+    @classmethod
+    async def find_page(
+        cls,
+        limit: int,
+        offset: int = 0,
+        after_id: int | None = None,
+        session: AsyncSession | None = None,
+        shape: str | None = None,
+        **filter_by
+    ):
+        """
+        Одна страница направлений, отфильтрованная и ограниченная на стороне БД.
+        При передаче after_id используется keyset-пагинация по первичному ключу,
+        и offset игнорируется. Результаты поиска упорядочены по релевантности,
+        поэтому для них after_id не поддерживается и используется offset.
+        """
+        if filter_by.get('search'):
+            after_id = None
+        async with session_scope(session) as session:
+            query = await cls._filtered_query(shape, **filter_by)
+            if after_id is not None:
+                query = query.filter(cls.model.id > after_id)
+            elif offset:
+                query = query.offset(offset)
+            query = query.order_by(cls.model.id).limit(limit)
+            result = await session.execute(query)
+            return result.all() if shape else result.scalars().all()
     
     @classmethod
-    async def get_popular(cls, limit: int = 10):
-        async with async_session_maker() as session:
+    async def search(
+        cls,
+        term: str,
+        limit: int = 20,
+        session: AsyncSession | None = None,
+        shape: str | None = None
+    ):
+        """
+        Поиск направлений по релевантности с ограничением в SQL.
+        """
+        async with session_scope(session) as session:
+            query = await cls._filtered_query(shape, search=term)
+            query = query.order_by(cls.model.id).limit(limit)
+            result = await session.execute(query)
+            return result.all() if shape else result.scalars().all()
+
+    @classmethod
+    async def find_nearby(
+        cls,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        limit: int = 20,
+        session: AsyncSession | None = None
+    ) -> list[dict]:
+        """
+        Ближайшие к точке направления в радиусе radius_km по возрастанию
+        расстояния: поля проекции "full" и distance_km. Кандидатов отбирает
+        nearby_index, из БД читаются только найденные направления.
+        """
+        nearest = await nearby_index.nearby(lat, lon, radius_km, limit)
+        rows = await cls.find_by_ids(
+            (destination_id for destination_id, _ in nearest), session=session, shape="full"
+        )
+        return [
+            {**rows[destination_id]._asdict(), "distance_km": round(distance, 3)}
+            for destination_id, distance in nearest
+            if destination_id in rows
+        ]
+
+    @classmethod
+    async def find_similar(
+        cls,
+        destination_id: int,
+        limit: int = 10,
+        session: AsyncSession | None = None
+    ) -> list[dict]:
+        """
+        Похожие по содержанию направления (content_index), самые похожие
+        первыми: поля проекции "full" и score.
+        """
+        similar = content_index.similar(destination_id, limit)
+        rows = await cls.find_by_ids(
+            (similar_id for similar_id, _ in similar), session=session, shape="full"
+        )
+        return [
+            {**rows[similar_id]._asdict(), "score": round(score, 4)}
+            for similar_id, score in similar
+            if similar_id in rows
+        ]
+
+    @classmethod
+    async def get_popular(
+        cls,
+        limit: int = 10,
+        session: AsyncSession | None = None,
+        shape: str | None = None
+    ):
+        async with session_scope(session) as session:
             query = (
-                select(cls.model)
-                .join(cls.model.reviews)
-                .group_by(cls.model.id)
-                .order_by(func.count(Review.id).desc())
+                cls._select(shape)
+                .join(DestinationStats, cls.model.id == DestinationStats.destination_id)
+                .filter(DestinationStats.review_count > 0)
+                # Ещё не оценённые фоновым пересчётом направления — в конце списка
+                .order_by(DestinationStats.popularity_score.desc().nulls_last(), DestinationStats.destination_id)
                 .limit(limit)
             )
             
             result = await session.execute(query)
-            return result.scalars().all()
\ No newline at end of file
+            return result.all() if shape else result.scalars().all()
+
+
+    @staticmethod
+    def _oversized(staging: Table):
+        """
+        Условие для строк, которые не поместятся в колонки destinations
+        (длина строки или разрядность числа).
+        """
+        conditions = []
+        for name in IMPORT_COLUMNS:
+            column_type = Destination.__table__.c[name].type
+            if isinstance(column_type, String) and column_type.length:
+                conditions.append(func.length(staging.c[name]) > column_type.length)
+            elif isinstance(column_type, Numeric) and column_type.precision:
+                limit = 10 ** (column_type.precision - (column_type.scale or 0))
+                conditions.append(func.abs(staging.c[name]) >= limit)
+        return or_(*conditions)
+
+    @classmethod
+    async def bulk_upsert(
+        cls,
+        rows: AsyncIterable[tuple],
+        session: AsyncSession | None = None
+    ) -> BulkUpsertResult:
+        """
+        Массовая загрузка направлений: строки (line, *IMPORT_COLUMNS) копируются
+        через COPY во временную таблицу, после чего сливаются с destinations
+        по паре (name, country) — существующие обновляются, новые вставляются.
+        При повторе пары в файле побеждает последняя строка.
+        """
+        async with session_scope(session, commit=True) as session:
+            await session.execute(select(func.pg_advisory_xact_lock(IMPORT_LOCK_KEY)))
+            connection = await session.connection()
+            await connection.run_sync(destinations_import.create)
+            await (await driver_connection(session)).copy_records_to_table(
+                destinations_import.name,
+                records=rows,
+                columns=list(destinations_import.c.keys()),
+            )
+
+            staging = destinations_import
+            rejected = (await session.execute(
+                delete(staging).where(cls._oversized(staging)).returning(staging.c.line)
+            )).scalars().all()
+
+            newer = staging.alias("newer")
+            await session.execute(
+                delete(staging).where(
+                    staging.c.name == newer.c.name,
+                    staging.c.country == newer.c.country,
+                    staging.c.line < newer.c.line,
+                )
+            )
+
+            table = cls.model.__table__
+            same_key = (table.c.name == staging.c.name) & (table.c.country == staging.c.country)
+            updated = (await session.execute(
+                update(table)
+                .values({
+                    name: staging.c[name]
+                    for name in IMPORT_COLUMNS
+                    if name not in ("name", "country")
+                })
+                .where(same_key)
+                .returning(table.c.id)
+            )).scalars().all()
+
+            exists = select(table.c.id).where(same_key).correlate(staging).exists()
+            inserted = (await session.execute(
+                insert(table)
+                .from_select(
+                    IMPORT_COLUMNS,
+                    select(*(staging.c[name] for name in IMPORT_COLUMNS))
+                    .where(~exists)
+                    .order_by(staging.c.line),
+                )
+                .returning(table.c.id)
+            )).scalars().all()
+
+            if inserted or updated:
+                cls._invalidate_indexes_on_commit(session, *inserted, *updated)
+                invalidate_on_commit(
+                    session,
+                    "destinations", "popular", "statistics",
+                    *(f"destination:{destination_id}" for destination_id in updated),
+                )
+            return BulkUpsertResult(inserted=inserted, updated=updated, rejected=sorted(rejected))
+
+    @classmethod
+    async def export(cls, fmt: str, session: AsyncSession | None = None) -> AsyncIterator[bytes]:
+        """
+        Потоковая выгрузка всех направлений через COPY ... TO STDOUT в формате
+        csv (с заголовком) или jsonl, кусками по EXPORT_CHUNK_SIZE байт.
+        Колонки те же, что и у импорта, так что выгрузку можно загрузить обратно.
+        """
+        columns = select(*(cls.model.__table__.c[name] for name in IMPORT_COLUMNS)).order_by(cls.model.id)
+        if fmt == "csv":
+            query = columns
+            copy_options = {"format": "csv", "header": True}
+        else:
+            rows = columns.subquery("destination")
+            query = select(func.row_to_json(rows.table_valued()))
+            # JSON из row_to_json не содержит ни управляющих символов, ни
+            # переводов строк, поэтому с такими кавычкой и разделителем COPY
+            # выводит каждую строку как есть, без экранирования
+            copy_options = {"format": "csv", "quote": "\x01", "delimiter": "\x02"}
+        sql = str(query.compile(dialect=postgresql.dialect()))
+
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=16)
+        buffer = bytearray()
+
+        async def collect(data: bytes):
+            buffer.extend(data)
+            if len(buffer) >= EXPORT_CHUNK_SIZE:
+                await queue.put(bytes(buffer))
+                buffer.clear()
+
+        async with session_scope(session) as session:
+            connection = await driver_connection(session)
+
+            async def produce():
+                try:
+                    await connection.copy_from_query(sql, output=collect, **copy_options)
+                    if buffer:
+                        await queue.put(bytes(buffer))
+                finally:
+                    # Если читатель ушёл и задачу отменили, ждать его не нужно
+                    if not asyncio.current_task().cancelling():
+                        await queue.put(None)
+
+            producer = asyncio.create_task(produce())
+            try:
+                while (chunk := await queue.get()) is not None:
+                    yield chunk
+                await producer
+            finally:
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+
+class DestinationStatsDAO(BaseDAO):
+    """
+    Инкрементально поддерживаемые агрегаты по направлениям.
+    Методы apply_* принимают сессию вызывающего DAO, чтобы изменение
+    статистики попадало в ту же транзакцию, что и изменение отзыва/поездки.
+    """
+    model = DestinationStats
+
+    COUNTERS = ("review_count", "rating_sum", "trip_count", "budget_sum", "budget_count")
+
+    @classmethod
+    async def find_by_destination_id(cls, destination_id: int, session: AsyncSession | None = None):
+        async with session_scope(session) as session:
+            query = select(cls.model).filter_by(destination_id=destination_id)
+            result = await session.execute(query)
+            return result.scalar_one_or_none()
+
+    @classmethod
+    async def find_rated(cls, session: AsyncSession | None = None):
+        """
+        Направления с отзывами вместе со статистикой, по убыванию рейтинга
+        популярности (тот же порядок, что и у DestinationDAO.get_popular).
+        """
+        async with session_scope(session) as session:
+            query = (
+                select(
+                    Destination.id,
+                    Destination.name,
+                    Destination.approximate_price,
+                    cls.model.review_count,
+                    cls.model.avg_rating,
+                    cls.model.trip_count,
+                )
+                .join(cls.model, cls.model.destination_id == Destination.id)
+                .filter(cls.model.review_count > 0)
+                .order_by(cls.model.popularity_score.desc().nulls_last(), cls.model.destination_id)
+            )
+            result = await session.execute(query)
+            return result.all()
+
+    @staticmethod
+    def review_delta(rating: int, sign: int = 1) -> dict:
+        return {"review_count": sign, "rating_sum": sign * rating}
+
+    @staticmethod
+    def trip_delta(budget, sign: int = 1) -> dict:
+        return {
+            "trip_count": sign,
+            "budget_sum": sign * (budget or 0),
+            "budget_count": sign if budget is not None else 0,
+        }
+
+    @classmethod
+    async def apply_delta(
+        cls,
+        session,
+        destination_id: int,
+        last_review_at=None,
+        refresh_last_review: bool = False,
+        **deltas
+    ):
+        """
+        Атомарно прибавляет deltas к счётчикам направления (UPSERT).
+        refresh_last_review пересчитывает last_review_at после удаления отзыва.
+        """
+        values = {name: deltas.get(name, 0) for name in cls.COUNTERS}
+        review_count, rating_sum = values["review_count"], values["rating_sum"]
+        query = pg_insert(cls.model).values(
+            destination_id=destination_id,
+            avg_rating=round(rating_sum / review_count, 2) if review_count > 0 else None,
+            last_review_at=last_review_at,
+            **values
+        )
+        table = cls.model.__table__
+        set_ = {name: table.c[name] + query.excluded[name] for name in cls.COUNTERS}
+        set_["avg_rating"] = func.round(
+            cast(set_["rating_sum"], Numeric) / func.nullif(set_["review_count"], 0), 2
+        )
+        if refresh_last_review:
+            set_["last_review_at"] = (
+                select(func.max(Review.created_at))
+                .filter(Review.destination_id == destination_id)
+                .scalar_subquery()
+            )
+        elif last_review_at is not None:
+            set_["last_review_at"] = func.greatest(table.c.last_review_at, query.excluded.last_review_at)
+        query = query.on_conflict_do_update(index_elements=[table.c.destination_id], set_=set_)
+        await session.execute(query)
+
+    @classmethod
+    async def rebuild(cls, session: AsyncSession | None = None):
+        """
+        Полный пересчёт статистики по таблицам reviews и trips (backfill).
+        """
+        async with session_scope(session, commit=True) as session:
+            reviews = (
+                select(
+                    Review.destination_id,
+                    func.count(Review.id).label("review_count"),
+                    func.sum(Review.rating).label("rating_sum"),
+                    func.round(func.avg(Review.rating), 2).label("avg_rating"),
+                    func.max(Review.created_at).label("last_review_at"),
+                )
+                .group_by(Review.destination_id)
+                .subquery()
+            )
+            trips = (
+                select(
+                    Trip.destination_id,
+                    func.count(Trip.id).label("trip_count"),
+                    func.coalesce(func.sum(Trip.budget), 0).label("budget_sum"),
+                    func.count(Trip.budget).label("budget_count"),
+                )
+                .group_by(Trip.destination_id)
+                .subquery()
+            )
+            source = (
+                select(
+                    Destination.id,
+                    func.coalesce(reviews.c.review_count, 0),
+                    func.coalesce(reviews.c.rating_sum, 0),
+                    reviews.c.avg_rating,
+                    func.coalesce(trips.c.trip_count, 0),
+                    func.coalesce(trips.c.budget_sum, literal(0)),
+                    func.coalesce(trips.c.budget_count, 0),
+                    reviews.c.last_review_at,
+                )
+                .outerjoin(reviews, reviews.c.destination_id == Destination.id)
+                .outerjoin(trips, trips.c.destination_id == Destination.id)
+            )
+            columns = ["destination_id", *cls.COUNTERS[:2], "avg_rating", *cls.COUNTERS[2:], "last_review_at"]
+            query = pg_insert(cls.model).from_select(columns, source)
+            query = query.on_conflict_do_update(
+                index_elements=[cls.model.destination_id],
+                set_={name: query.excluded[name] for name in columns[1:]},
+            )
+            await session.execute(query)
+
+    @classmethod
+    async def refresh_popularity(
+        cls,
+        half_life_days: float,
+        prior_weight: float,
+        session: AsyncSession | None = None
+    ) -> int | None:
+        """
+        Пересчитывает popularity_score всех направлений одним UPDATE.
+
+        Вес отзыва убывает вдвое каждые half_life_days дней. Оценка — байесовская
+        средняя: (C·m + Σ w·rating) / (C + Σ w), где m — средняя взвешенная оценка
+        по всем отзывам, C = prior_weight. Направления с парой свежих отзывов
+        не обгоняют проверенные, а старые отзывы постепенно перестают влиять.
+        Возвращает число обновлённых строк или None, если пересчёт уже идёт
+        в другом воркере.
+        """
+        async with session_scope(session, commit=True) as session:
+            locked = await session.scalar(select(func.pg_try_advisory_xact_lock(POPULARITY_LOCK_KEY)))
+            if not locked:
+                return None
+
+            age = cast(func.extract("epoch", func.now() - Review.created_at), Float)
+            weight = func.power(literal(0.5, Float), age / literal(half_life_days * 86400, Float), type_=Float)
+            decayed = (
+                select(
+                    Review.destination_id,
+                    func.sum(weight).label("weight"),
+                    func.sum(weight * Review.rating).label("weighted_sum"),
+                )
+                .group_by(Review.destination_id)
+                .cte("decayed")
+            )
+            prior = (
+                select(func.sum(decayed.c.weighted_sum) / func.nullif(func.sum(decayed.c.weight), 0.0))
+                .scalar_subquery()
+            )
+            prior_weight = literal(prior_weight, Float)
+            score = (
+                (prior_weight * func.coalesce(prior, 0.0) + decayed.c.weighted_sum)
+                / (prior_weight + decayed.c.weight)
+            )
+
+            # Направления, у которых не осталось отзывов, выпадают из рейтинга
+            await session.execute(
+                update(cls.model)
+                .where(cls.model.review_count == 0, cls.model.popularity_score.isnot(None))
+                .values(popularity_score=None)
+            )
+            result = await session.execute(
+                update(cls.model)
+                .where(cls.model.destination_id == decayed.c.destination_id)
+                .values(popularity_score=score)
+            )
+            return result.rowcount
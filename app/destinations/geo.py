@@ -0,0 +1,140 @@
+import asyncio
+import math
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session_maker
+from app.destinations.models import Destination
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Расстояния по дуге большого круга от точки (lat, lon) до массивов
+    точек (lats, lons); все координаты в радианах.
+    """
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class NearbyIndex:
+    """
+    Снимок координат направлений в памяти процесса с сеточным индексом:
+    точки отсортированы по номеру ячейки cell_degrees x cell_degrees, запрос
+    выбирает диапазоны ячеек, покрывающих круг поиска, и считает haversine
+    для кандидатов одним векторным проходом numpy. Снимок перестраивается
+    после изменения направлений (invalidate) и не реже, чем раз в ttl секунд.
+    """
+
+    def __init__(self, ttl: float, cell_degrees: float):
+        self.ttl = ttl
+        self.cell_degrees = cell_degrees
+        self.rows = math.ceil(180 / cell_degrees)
+        self.cols = math.ceil(360 / cell_degrees)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._lats = np.empty(0)
+        self._lons = np.empty(0)
+        self._cells = np.empty(0, dtype=np.int64)
+        self._built_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._built_at = None
+
+    def _row(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90) / self.cell_degrees), 0, self.rows - 1).astype(np.int64)
+
+    def _col(self, lon):
+        return np.floor((np.asarray(lon) + 180) / self.cell_degrees).astype(np.int64) % self.cols
+
+    async def _ensure_index(self):
+        if self._built_at is not None and time.monotonic() - self._built_at < self.ttl:
+            return
+        async with self._lock:
+            if self._built_at is not None and time.monotonic() - self._built_at < self.ttl:
+                return
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(Destination.id, Destination.latitude, Destination.longitude)
+                )
+                rows = result.all()
+            ids = np.array([row.id for row in rows], dtype=np.int64)
+            lats = np.array([float(row.latitude) for row in rows])
+            lons = np.array([float(row.longitude) for row in rows])
+            cells = self._row(lats) * self.cols + self._col(lons)
+            order = np.argsort(cells, kind="stable")
+            self._ids = ids[order]
+            self._lats = np.radians(lats[order])
+            self._lons = np.radians(lons[order])
+            self._cells = cells[order]
+            self._built_at = time.monotonic()
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """
+        Позиции точек снимка в ячейках, покрывающих круг радиуса radius_km.
+        """
+        angle = radius_km / EARTH_RADIUS_KM
+        delta_lat = math.degrees(angle)
+        first_row, last_row = self._row(lat - delta_lat), self._row(lat + delta_lat)
+
+        # Полуширина круга по долготе; у полюса и для больших радиусов — все долготы
+        sin_angle, cos_lat = math.sin(angle), math.cos(math.radians(lat))
+        full_width = (
+            angle >= math.pi / 2
+            or lat - delta_lat <= -90
+            or lat + delta_lat >= 90
+            or sin_angle >= cos_lat
+        )
+        if full_width:
+            col_spans = [(0, self.cols - 1)]
+        else:
+            delta_lon = math.degrees(math.asin(sin_angle / cos_lat))
+            first_col, last_col = int(self._col(lon - delta_lon)), int(self._col(lon + delta_lon))
+            if 2 * delta_lon >= 360 - self.cell_degrees:
+                col_spans = [(0, self.cols - 1)]
+            elif first_col <= last_col:
+                col_spans = [(first_col, last_col)]
+            else:
+                # Круг пересекает 180-й меридиан
+                col_spans = [(first_col, self.cols - 1), (0, last_col)]
+
+        rows = np.arange(first_row, last_row + 1, dtype=np.int64)
+        low = np.concatenate([rows * self.cols + first for first, _ in col_spans])
+        high = np.concatenate([rows * self.cols + last for _, last in col_spans])
+        starts = np.searchsorted(self._cells, low, side="left")
+        ends = np.searchsorted(self._cells, high, side="right")
+        return np.concatenate(
+            [np.arange(start, end) for start, end in zip(starts, ends) if end > start]
+            or [np.empty(0, dtype=np.int64)]
+        )
+
+    async def nearby(self, lat: float, lon: float, radius_km: float, limit: int) -> list[tuple[int, float]]:
+        """
+        До limit ближайших направлений в радиусе radius_km: пары (id, расстояние в км)
+        по возрастанию расстояния.
+        """
+        await self._ensure_index()
+        positions = self._candidates(lat, lon, radius_km)
+        distances = haversine_km(
+            math.radians(lat), math.radians(lon), self._lats[positions], self._lons[positions]
+        )
+        inside = distances <= radius_km
+        positions, distances = positions[inside], distances[inside]
+        if len(distances) > limit:
+            nearest = np.argpartition(distances, limit - 1)[:limit]
+            positions, distances = positions[nearest], distances[nearest]
+        order = np.argsort(distances, kind="stable")
+        return [
+            (int(destination_id), float(distance))
+            for destination_id, distance in zip(self._ids[positions[order]], distances[order])
+        ]
+
+
+nearby_index = NearbyIndex(ttl=settings.NEARBY_INDEX_TTL, cell_degrees=settings.NEARBY_CELL_DEGREES)
@@ -1,5 +1,7 @@
+from datetime import datetime
 from typing import TYPE_CHECKING, Optional
-from sqlalchemy import Integer, Numeric, String
+from sqlalchemy import Computed, DateTime, Float, ForeignKey, Index, Integer, Numeric, String, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -19,6 +21,55 @@ class Destination(Base):
     latitude: Mapped[float] = mapped_column(Numeric(10, 8))
     longitude: Mapped[float] = mapped_column(Numeric(11, 8))
     image_url: Mapped[Optional[str]] = mapped_column(String(500))
+    # Поисковый вектор для полнотекстового поиска (см. app/destinations/search.py).
+    # Триграммный индекс по name создаётся миграцией, только если доступен pg_trgm.
+    search_vector = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(country, '') || ' ' || coalesce(climate, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'C')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
     
-    trips = relationship("Trip", back_populates="destination", lazy='selectin')
-    reviews = relationship("Review", back_populates="destination")
\ No newline at end of file
+    __table_args__ = (
+        Index("ix_destinations_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    
+    # Поездки не подгружаются неявно: нужны — передайте selectinload(Destination.trips)
+    trips = relationship("Trip", back_populates="destination", lazy='raise')
+    reviews = relationship("Review", back_populates="destination")
+
+
+class DestinationStats(Base):
+    """
+    Агрегаты по направлению, которые поддерживаются инкрементально
+    в тех же транзакциях, что и изменения отзывов и поездок.
+    """
+    __tablename__ = "destination_stats"
+
+    destination_id: Mapped[int] = mapped_column(
+        ForeignKey("destinations.id", ondelete="CASCADE"), primary_key=True
+    )
+    review_count: Mapped[int] = mapped_column(Integer, default=0, index=True)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0)
+    avg_rating: Mapped[Optional[float]] = mapped_column(Numeric(4, 2))
+    trip_count: Mapped[int] = mapped_column(Integer, default=0)
+    budget_sum: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+    # Количество поездок с указанным бюджетом (AVG в SQL игнорирует NULL)
+    budget_count: Mapped[int] = mapped_column(Integer, default=0)
+    last_review_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    # Байесовская средняя оценка с затуханием по давности отзывов; пересчитывается
+    # периодически (app/destinations/ranking.py); NULL — ещё не оценено или нет отзывов
+    popularity_score: Mapped[Optional[float]] = mapped_column(Float)
+
+    __table_args__ = (
+        # Порядок индекса совпадает с ORDER BY в DestinationDAO.get_popular
+        Index(
+            "ix_destination_stats_popularity",
+            text("popularity_score DESC NULLS LAST"),
+            "destination_id",
+        ),
+    )
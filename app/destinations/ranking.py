@@ -0,0 +1,60 @@
+"""
+Периодический пересчёт рейтинга популярности направлений
+(destination_stats.popularity_score, см. DestinationStatsDAO.refresh_popularity).
+
+Разовый пересчёт: python -m app.destinations.ranking
+"""
+import asyncio
+import time
+
+from app.config import settings
+from app.destinations.dao import DestinationStatsDAO
+from app.response_cache import invalidate_tags
+
+
+class PopularityRanker:
+    """
+    Пересчёт рейтинга; планировщик заданий (app/jobs/tasks.py) запускает его
+    раз в POPULARITY_REFRESH_INTERVAL секунд. Списки популярных направлений
+    читают готовые значения по индексу, поэтому новый отзыв попадает
+    в рейтинг со следующим пересчётом.
+    """
+
+    def __init__(self, half_life_days: float, prior_weight: float):
+        self.half_life_days = half_life_days
+        self.prior_weight = prior_weight
+        self._updated: int | None = None
+        self._duration: float | None = None
+        self._refreshed_at: float | None = None
+        self.skipped = 0
+
+    async def refresh(self):
+        started = time.monotonic()
+        updated = await DestinationStatsDAO.refresh_popularity(self.half_life_days, self.prior_weight)
+        if updated is None:
+            self.skipped += 1
+            return
+        self._updated = updated
+        self._duration = time.monotonic() - started
+        self._refreshed_at = time.monotonic()
+        invalidate_tags("popular")
+
+    def stats(self) -> dict:
+        return {
+            "updated": self._updated,
+            "duration_seconds": round(self._duration, 3) if self._duration is not None else None,
+            "age_seconds": (
+                round(time.monotonic() - self._refreshed_at, 1) if self._refreshed_at is not None else None
+            ),
+            "skipped": self.skipped,
+        }
+
+
+popularity_ranker = PopularityRanker(
+    half_life_days=settings.POPULARITY_HALF_LIFE_DAYS,
+    prior_weight=settings.POPULARITY_PRIOR_WEIGHT,
+)
+
+
+if __name__ == "__main__":
+    asyncio.run(popularity_ranker.refresh())
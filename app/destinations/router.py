@@ -1,9 +1,21 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import get_uow
+
+from app.destinations.bulk import ImportReport, import_destinations
 from app.destinations.dao import DestinationDAO
 from app.destinations.models import Destination
-from app.destinations.schemas import SDestinationCreate, SDestinationUpdate
+from app.destinations.schemas import (
+    SDestination,
+    SDestinationCreate,
+    SDestinationUpdate,
+    SNearbyDestination,
+    SSimilarDestination,
+)
+from app.schemas import SMessage
 from app.users.dependencies import get_current_admin_user
 from app.users.models import User
 
@@ -12,16 +24,18 @@ router = APIRouter(
     tags=["Пути"]
 )
 
-@router.post("")
+@router.post("", response_model=SDestination)
 async def create_destination(
     destination_data: SDestinationCreate,
-    current_user: User = Depends(get_current_admin_user)
+    current_user: User = Depends(get_current_admin_user),
+    session: AsyncSession = Depends(get_uow)
 ):
     """
     Создание нового направления (только для администраторов).
     """
     try:
-        new_destination = await DestinationDAO.add(
+        destination_id = await DestinationDAO.add(
+            session=session,
             name=destination_data.name,
             description=destination_data.description,
             country=destination_data.country,
@@ -31,23 +45,30 @@ async def create_destination(
             longitude=destination_data.longitude,
             image_url=destination_data.image_url
         )
-        new_dest = await DestinationDAO.find_one_or_none(name=destination_data.name) 
-        return new_dest
+        return await DestinationDAO.find_by_id(destination_id, session=session, shape="full")
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@router.get("")  # Обратите внимание на response_class
+@router.get("", response_model=list[SDestination])
 async def get_destinations(
+    response: Response,
     country: Optional[str] = None,
     min_budget: Optional[float] = None,
     max_budget: Optional[float] = None,
     search: Optional[str] = None,  # Добавляем параметр search
-    page: int = 1,
-    limit: int = 20,
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1),
+    cursor: Optional[int] = None,  # id последнего направления предыдущей страницы
 ):
     """
     API endpoint для получения списка направлений с фильтрацией и поиском.
+    Фильтрация по бюджету и пагинация выполняются в БД. Если передан cursor,
+    используется keyset-пагинация, и параметр page игнорируется.
+    Результаты поиска отсортированы по релевантности и листаются через page.
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    Направления выбираются строками (shape="full") и сериализуются по
+    SDestination без создания ORM-объектов.
     """
     filters = {}
     if country:
@@ -56,43 +77,81 @@ async def get_destinations(
     if search:
         filters["search"] = search  # Добавляем search в фильтры
 
-    destinations = await DestinationDAO.find_all(**filters)
+    if min_budget is not None:
+        filters["min_budget"] = min_budget
+    if max_budget is not None:
+        filters["max_budget"] = max_budget
 
-    if min_budget is not None or max_budget is not None:
-        filtered_destinations = []
-        for dest in destinations:
-            trips = dest.trips
+    destinations = await DestinationDAO.find_page(
+        limit=limit,
+        offset=(page - 1) * limit,
+        after_id=cursor,
+        shape="full",
+        **filters
+    )
 
-            valid_budget = True
-            if trips:
-                avg_budget = (
-                    sum(trip.budget for trip in trips if trip.budget) / len(trips)
-                    if trips
-                    else 0
-                )
-                if min_budget and avg_budget < min_budget:
-                    valid_budget = False
-                if max_budget and avg_budget > max_budget:
-                    valid_budget = False
+    if len(destinations) == limit and not search:
+        response.headers["X-Next-Cursor"] = str(destinations[-1].id)
 
-            if valid_budget:
-                filtered_destinations.append(dest)
+    return destinations
 
-        destinations = filtered_destinations
 
-    start_idx = (page - 1) * limit
-    end_idx = start_idx + limit
 
-    return destinations[start_idx:end_idx]
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
 
 
+@router.post("/import", response_model=ImportReport)
+async def import_destinations_file(
+    file: UploadFile,
+    fmt: Literal["csv", "jsonl"] = Query("csv", alias="format"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Массовый импорт направлений из csv или jsonl (только для администраторов).
+    Записи валидируются по SDestinationCreate по мере чтения и загружаются
+    через COPY; направления с совпадающими name и country обновляются.
+    Невалидные строки пропускаются и перечисляются в отчёте.
+    """
+    return await import_destinations(file.file, fmt)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_destinations_file(
+    fmt: Literal["csv", "jsonl"] = Query("csv", alias="format"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Потоковая выгрузка всех направлений в csv или jsonl (только для администраторов).
+    """
+    return StreamingResponse(
+        DestinationDAO.export(fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="destinations.{fmt}"'},
+    )
 
-@router.get("/popular")
-async def get_popular_destinations():
-    return await DestinationDAO.get_popular(limit=10)
 
+@router.get("/popular", response_model=list[SDestination])
+async def get_popular_destinations(limit: int = Query(10, ge=1)):
+    return await DestinationDAO.get_popular(limit=limit, shape="full")
 
-@router.get("/search")
+
+@router.get("/nearby", response_model=list[SNearbyDestination])
+async def get_nearby_destinations(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(100, gt=0, le=20000),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Направления в радиусе radius_km от точки (lat, lon), ближайшие первыми.
+    """
+    return await DestinationDAO.find_nearby(lat, lon, radius_km, limit)
+
+
+@router.get("/search", response_model=list[SDestination])
 async def search_destinations(query: str):
     
     if not query or len(query.strip()) < 1:
@@ -101,14 +160,13 @@ async def search_destinations(query: str):
             detail="Поисковый запрос не может быть пустым"
         )
     
-    destinations = await DestinationDAO.find_all(name=query)
-    return destinations[:20]
+    return await DestinationDAO.search(query.strip(), limit=20, shape="full")
 
 
-@router.get("/{destination_id}")
+@router.get("/{destination_id}", response_model=SDestination)
 async def get_destination_by_id(destination_id: int):
     
-    destination = await DestinationDAO.find_by_id(destination_id)
+    destination = await DestinationDAO.find_by_id(destination_id, shape="full")
     if not destination:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -118,7 +176,18 @@ async def get_destination_by_id(destination_id: int):
     return destination
 
 
-@router.put("/{destination_id}")
+@router.get("/{destination_id}/similar", response_model=list[SSimilarDestination])
+async def get_similar_destinations(
+    destination_id: int,
+    limit: int = Query(10, ge=1, le=20),
+):
+    """
+    Направления, похожие на данное по описанию, стране, климату и цене.
+    """
+    return await DestinationDAO.find_similar(destination_id, limit)
+
+
+@router.put("/{destination_id}", response_model=SDestination)
 async def update_destination(
     destination_id: int,
     destination_data: SDestinationUpdate,  # Используем схему для валидации
@@ -133,7 +202,7 @@ async def update_destination(
     return destination
 
 
-@router.delete("/{destination_id}")
+@router.delete("/{destination_id}", response_model=SMessage)
 async def delete_destination(
     destination_id: int,
     current_user: User = Depends(get_current_admin_user)  # Только для администраторов
@@ -57,4 +57,37 @@ class SDestinationCreate(BaseModel):
     def image_url_must_be_valid(cls, value):
         if value is not None and not value.startswith(('http://', 'https://')):
             raise ValueError('URL изображения должен начинаться с http:// или https://')
-        return value
\ No newline at end of file
+        return value
+
+
+class SDestination(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    country: str
+    climate: str
+    approximate_price: float
+    latitude: float
+    longitude: float
+    image_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SNearbyDestination(SDestination):
+    distance_km: float
+
+
+class SSimilarDestination(SDestination):
+    score: float
+
+
+class SDestinationBrief(BaseModel):
+    id: int
+    name: str
+    country: str
+    image_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
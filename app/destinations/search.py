@@ -0,0 +1,138 @@
+import asyncio
+import difflib
+import re
+import time
+from collections import defaultdict
+
+from sqlalchemy import case, false, func, or_, select, text
+
+from app.config import settings
+from app.database import async_session_maker
+from app.destinations.models import Destination
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(value: str | None) -> list[str]:
+    return TOKEN_RE.findall(value.lower()) if value else []
+
+
+class PostgresSearchBackend:
+    """
+    Полнотекстовый поиск по колонке search_vector (GIN) с префиксным
+    сопоставлением слов и нечётким поиском по названию через pg_trgm.
+    """
+
+    name = "postgres"
+
+    async def apply(self, query, term: str):
+        tokens = tokenize(term)
+        if not tokens:
+            return query.filter(false())
+        ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        # term <% name: слово из названия похоже на запрос (индекс gin_trgm_ops)
+        similarity = func.word_similarity(term, Destination.name)
+        rank = func.ts_rank_cd(Destination.search_vector, ts_query) + similarity
+        return (
+            query
+            .filter(or_(
+                Destination.search_vector.op("@@")(ts_query),
+                Destination.name.op("%>")(term),
+            ))
+            .order_by(rank.desc())
+        )
+
+
+class InMemorySearchBackend:
+    """
+    Инвертированный индекс в памяти процесса на случай, когда в БД нет
+    search_vector или pg_trgm. Индекс перестраивается после изменения
+    направлений (invalidate) и не реже, чем раз в SEARCH_INDEX_TTL секунд.
+    """
+
+    name = "memory"
+
+    FIELD_WEIGHTS = {"name": 3.0, "country": 2.0, "climate": 2.0, "description": 1.0}
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._postings: dict[str, dict[int, float]] = {}
+        self._vocabulary: list[str] = []
+        self._built_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._built_at = None
+
+    async def _ensure_index(self):
+        if self._built_at is not None and time.monotonic() - self._built_at < self.ttl:
+            return
+        async with self._lock:
+            if self._built_at is not None and time.monotonic() - self._built_at < self.ttl:
+                return
+            async with async_session_maker() as session:
+                columns = [getattr(Destination, field) for field in self.FIELD_WEIGHTS]
+                result = await session.execute(select(Destination.id, *columns))
+                rows = result.all()
+            postings: dict[str, dict[int, float]] = defaultdict(lambda: defaultdict(float))
+            for destination_id, *values in rows:
+                for weight, value in zip(self.FIELD_WEIGHTS.values(), values):
+                    for token in tokenize(value):
+                        postings[token][destination_id] += weight
+            self._postings = {token: dict(ids) for token, ids in postings.items()}
+            self._vocabulary = sorted(self._postings)
+            self._built_at = time.monotonic()
+
+    def _expand(self, token: str) -> dict[str, float]:
+        """
+        Слова индекса, подходящие под слово запроса: точное совпадение,
+        префикс и (для опечаток) близкие по написанию слова.
+        """
+        matches = {word: 0.8 for word in self._vocabulary if word.startswith(token)}
+        for word in difflib.get_close_matches(token, self._vocabulary, n=5, cutoff=0.75):
+            matches.setdefault(word, 0.5)
+        if token in self._postings:
+            matches[token] = 1.0
+        return matches
+
+    async def rank(self, term: str) -> list[int]:
+        await self._ensure_index()
+        scores: dict[int, float] = defaultdict(float)
+        for token in tokenize(term):
+            for word, factor in self._expand(token).items():
+                for destination_id, weight in self._postings[word].items():
+                    scores[destination_id] += weight * factor
+        return sorted(scores, key=lambda destination_id: (-scores[destination_id], destination_id))
+
+    async def apply(self, query, term: str):
+        ranked_ids = await self.rank(term)
+        if not ranked_ids:
+            return query.filter(false())
+        position = case({destination_id: idx for idx, destination_id in enumerate(ranked_ids)}, value=Destination.id)
+        return query.filter(Destination.id.in_(ranked_ids)).order_by(position)
+
+
+postgres_search = PostgresSearchBackend()
+memory_search = InMemorySearchBackend(ttl=settings.SEARCH_INDEX_TTL)
+_backend = None
+
+
+async def get_search_backend():
+    """
+    Выбирает бэкенд поиска по настройке SEARCH_BACKEND ("auto", "postgres",
+    "memory"). В режиме auto один раз проверяет наличие pg_trgm и search_vector.
+    """
+    global _backend
+    if _backend is None:
+        if settings.SEARCH_BACKEND == "auto":
+            async with async_session_maker() as session:
+                result = await session.execute(text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') "
+                    "AND EXISTS (SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'destinations' AND column_name = 'search_vector')"
+                ))
+                available = result.scalar_one()
+            _backend = postgres_search if available else memory_search
+        else:
+            _backend = postgres_search if settings.SEARCH_BACKEND == "postgres" else memory_search
+    return _backend
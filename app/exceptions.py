@@ -35,3 +35,20 @@ UserIsNotAdmin = HTTPException(
     detail="У вас нет достаточных прав."
 )
 
+TripDatesOverlapException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Даты пересекаются с существующим путешествием",
+)
+
+
+class TooManyRequestsException(HTTPException):
+    """
+    429 с заголовком Retry-After: через сколько секунд можно повторить запрос.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много попыток. Повторите позже.",
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,55 @@
+import csv
+import io
+from decimal import Decimal
+from typing import AsyncIterator, Sequence
+
+import orjson
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Строки копятся в буфере и отдаются клиенту кусками примерно такого размера
+CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+async def encode_ndjson(rows: AsyncIterator) -> AsyncIterator[bytes]:
+    buffer = bytearray()
+    async for row in rows:
+        buffer += orjson.dumps(row._asdict(), default=_json_default)
+        buffer += b"\n"
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def encode_csv(rows: AsyncIterator, columns: Sequence[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_rows(rows: AsyncIterator, columns: Sequence[str], fmt: str) -> AsyncIterator[bytes]:
+    """
+    Тело потоковой выгрузки строк БД в формате ndjson или csv (с заголовком).
+    """
+    if fmt == "csv":
+        return encode_csv(rows, columns)
+    return encode_ndjson(rows)
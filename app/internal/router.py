@@ -0,0 +1,69 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.database import pool_metrics, replica_set
+from app.destinations.ranking import popularity_ranker
+from app.internal.export import EXPORT_MEDIA_TYPES, encode_rows
+from app.jobs.scheduler import scheduler
+from app.rate_limit.limiter import auth_limiter
+from app.recommendations.content import content_index
+from app.recommendations.engine import recommendation_engine
+from app.response_cache import response_cache
+from app.reviews.dao import ReviewDAO
+from app.trips.dao import TripDAO
+from app.users.dao import UserDAO, user_cache
+from app.users.dependencies import get_current_admin_user
+from app.users.models import User
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Служебное"]
+)
+
+
+@router.get("/stats")
+async def get_internal_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Внутренние метрики процесса (только для администраторов).
+    """
+    return {
+        "pool": pool_metrics.snapshot(),
+        "replicas": replica_set.stats(),
+        "user_cache": user_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "recommendations": recommendation_engine.stats(),
+        "similarity_index": content_index.stats(),
+        "popularity": popularity_ranker.stats(),
+        "jobs": scheduler.stats(),
+        "rate_limit": auth_limiter.stats(),
+    }
+
+
+# Таблица выгрузки -> (DAO, проекция из его SHAPES)
+EXPORTS = {
+    "users": (UserDAO, "export"),
+    "trips": (TripDAO, "full"),
+    "reviews": (ReviewDAO, "full"),
+}
+
+
+@router.get("/export/{table}", response_class=StreamingResponse)
+async def export_table(
+    table: Literal["users", "trips", "reviews"],
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Потоковая выгрузка таблицы в ndjson или csv (только для администраторов).
+    Строки читаются серверным курсором (BaseDAO.stream), поэтому расход
+    памяти не зависит от размера таблицы.
+    """
+    dao, shape = EXPORTS[table]
+    columns = [column.key for column in dao.SHAPES[shape]]
+    return StreamingResponse(
+        encode_rows(dao.stream(shape), columns, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{fmt}"'},
+    )
@@ -0,0 +1,48 @@
+import asyncio
+
+from app.config import settings
+
+
+class InMemoryJobQueue:
+    """
+    Очередь заданий в памяти процесса. Задание с тем же именем, которое
+    ещё ждёт выполнения или выполняется, второй раз не ставится: медленная
+    задача не накапливает очередь из собственных повторов.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._pending: set[str] = set()
+
+    async def put(self, job_name: str) -> bool:
+        if job_name in self._pending:
+            return False
+        self._pending.add(job_name)
+        await self._queue.put(job_name)
+        return True
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+    async def done(self, job_name: str):
+        self._pending.discard(job_name)
+
+    def size(self) -> int:
+        return self._queue.qsize()
+
+
+# Бэкенды очереди по имени из настройки JOBS_QUEUE_BACKEND. Другой бэкенд
+# (например, общий для нескольких процессов) реализует те же put/get/done/size
+QUEUE_BACKENDS = {
+    InMemoryJobQueue.name: InMemoryJobQueue,
+}
+
+
+def get_job_queue():
+    try:
+        backend = QUEUE_BACKENDS[settings.JOBS_QUEUE_BACKEND]
+    except KeyError:
+        raise ValueError(f"Неизвестный бэкенд очереди заданий: {settings.JOBS_QUEUE_BACKEND}")
+    return backend()
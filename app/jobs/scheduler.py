@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.jobs.queue import get_job_queue
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    func: Callable[[], Awaitable]
+    interval: float
+    next_run: float = 0.0
+    runs: int = 0
+    failures: int = 0
+    last_duration: float | None = None
+    last_result: object = None
+
+
+class Scheduler:
+    """
+    Планировщик периодических заданий внутри процесса. Когда подходит срок
+    задания, планировщик ставит его имя в очередь, а workers воркеров
+    выполняют задания из очереди. Задание запускается при старте и затем
+    не чаще раза в interval секунд; ошибка логируется и не останавливает
+    остальные задания.
+    """
+
+    def __init__(self, queue, workers: int, tick: float = 1.0):
+        self.queue = queue
+        self.workers = workers
+        self.tick = tick
+        self.jobs: dict[str, PeriodicJob] = {}
+
+    def add(self, name: str, func: Callable[[], Awaitable], interval: float):
+        self.jobs[name] = PeriodicJob(name, func, interval)
+
+    async def _schedule_forever(self):
+        while True:
+            now = time.monotonic()
+            for job in self.jobs.values():
+                if now >= job.next_run:
+                    job.next_run = now + job.interval
+                    await self.queue.put(job.name)
+            next_run = min((job.next_run for job in self.jobs.values()), default=now + self.tick)
+            await asyncio.sleep(max(min(next_run - time.monotonic(), self.tick), 0))
+
+    async def _run(self, job: PeriodicJob):
+        started = time.monotonic()
+        try:
+            job.last_result = await job.func()
+        except Exception:
+            job.failures += 1
+            logger.exception("Задание %s завершилось с ошибкой", job.name)
+        finally:
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+
+    async def _work_forever(self):
+        while True:
+            name = await self.queue.get()
+            try:
+                job = self.jobs.get(name)
+                if job is None:
+                    logger.warning("Неизвестное задание в очереди: %s", name)
+                    continue
+                await self._run(job)
+            finally:
+                await self.queue.done(name)
+
+    async def run(self):
+        """
+        Планировщик и воркеры; работает до отмены задачи.
+        """
+        await asyncio.gather(
+            self._schedule_forever(),
+            *(self._work_forever() for _ in range(self.workers)),
+        )
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.queue.name,
+            "queued": self.queue.size(),
+            "jobs": {
+                job.name: {
+                    "interval": job.interval,
+                    "runs": job.runs,
+                    "failures": job.failures,
+                    "last_duration_seconds": (
+                        round(job.last_duration, 3) if job.last_duration is not None else None
+                    ),
+                    "last_result": job.last_result,
+                }
+                for job in self.jobs.values()
+            },
+        }
+
+
+scheduler = Scheduler(get_job_queue(), workers=settings.JOBS_WORKERS)
@@ -0,0 +1,12 @@
+"""
+Периодические задания процесса. Планировщик запускается в lifespan приложения.
+"""
+from app.config import settings
+from app.destinations.ranking import popularity_ranker
+from app.jobs.scheduler import scheduler
+from app.rate_limit.limiter import auth_limiter
+from app.trips.dao import TripDAO
+
+scheduler.add("trips.update_statuses", TripDAO.update_statuses, interval=settings.TRIP_STATUS_INTERVAL)
+scheduler.add("destinations.popularity", popularity_ranker.refresh, interval=settings.POPULARITY_REFRESH_INTERVAL)
+scheduler.add("rate_limit.cleanup", auth_limiter.cleanup, interval=settings.RATE_LIMIT_CLEANUP_INTERVAL)
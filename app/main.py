@@ -1,21 +1,68 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
 
 from app.destinations.router import router as destinations_router
 from app.reviews.router import router as reviews_router
 from app.trips.router import router as trips_router
 from app.users.router import router as users_router
 from app.pages.router import router as pages_router
+from app.internal.router import router as internal_router
+from app.recommendations.router import router as recommendations_router
+from app.response_cache import ResponseCacheMiddleware
+from app.database import ReadAfterWriteMiddleware, engine, replica_set
+from app.compression import CompressionMiddleware
+from app.assets import FingerprintedStaticFiles, asset_manifest
+from app.pages.statistics import statistics_cache
+from app.jobs.tasks import scheduler
+from app.recommendations.content import content_index
+from app.recommendations.engine import recommendation_engine
+from app.pages.templating import precompile_templates
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(asset_manifest.build)
+    await asyncio.to_thread(precompile_templates)
+    tasks = [
+        asyncio.create_task(statistics_cache.refresh_forever()),
+        asyncio.create_task(recommendation_engine.refresh_forever()),
+        # Периодические задания: статусы поездок, рейтинг популярности
+        asyncio.create_task(scheduler.run()),
+        # Индекс похожих направлений открывается (или собирается) в фоне
+        asyncio.create_task(content_index.ensure()),
+    ]
+    if replica_set.enabled:
+        tasks.append(asyncio.create_task(replica_set.check_forever()))
+    yield
+    for task in tasks:
+        task.cancel()
+    # Прерванные задания должны откатить транзакции и вернуть соединения в пул
+    # до того, как пулы закрываются
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await replica_set.dispose()
+    await engine.dispose()
+
 
+# JSON-ответы сериализуются через orjson; схемы ответов задаются response_model
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
-app = FastAPI()
+# Последний добавленный middleware — внешний: кэш хранит несжатые ответы
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(CompressionMiddleware)
+# Внешний: привязка к primary должна быть известна кэшу ответов
+app.add_middleware(ReadAfterWriteMiddleware)
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", FingerprintedStaticFiles(directory="app/static"), name="static")
 
 app.include_router(destinations_router)
 app.include_router(reviews_router)
 app.include_router(trips_router)
 app.include_router(users_router)
 app.include_router(pages_router)
+app.include_router(internal_router)
+app.include_router(recommendations_router)
 
 
@@ -11,9 +11,10 @@ sys.path.insert(0, dirname(dirname(dirname(abspath(__file__)))))
 
 from app.database import Base
 from app.users.models import User
-from app.destinations.models import Destination
+from app.destinations.models import Destination, DestinationStats
 from app.reviews.models import Review
 from app.trips.models import Trip
+from app.rate_limit.models import RateLimitBucket
 from app.config import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,39 @@
+"""popularity index nulls last
+
+Revision ID: 0c7d5b2f9a61
+Revises: a6f03d9e7b14
+Create Date: 2026-10-18 19:12:37.420615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c7d5b2f9a61'
+down_revision: Union[str, None] = 'a6f03d9e7b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Неоценённые направления остаются в списке популярных (в конце),
+    # поэтому индекс покрывает и строки с NULL
+    op.drop_index('ix_destination_stats_popularity', table_name='destination_stats')
+    op.create_index(
+        'ix_destination_stats_popularity',
+        'destination_stats',
+        [sa.text('popularity_score DESC NULLS LAST'), 'destination_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_destination_stats_popularity', table_name='destination_stats')
+    op.create_index(
+        'ix_destination_stats_popularity',
+        'destination_stats',
+        [sa.text('popularity_score DESC'), 'destination_id'],
+        postgresql_where=sa.text('popularity_score IS NOT NULL'),
+    )
@@ -0,0 +1,66 @@
+"""destination stats
+
+Revision ID: 3f1c2a7d9b4e
+Revises: 97739bbdbddd
+Create Date: 2026-10-18 10:12:04.311527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b4e'
+down_revision: Union[str, None] = '97739bbdbddd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('destination_stats',
+    sa.Column('destination_id', sa.Integer(), nullable=False),
+    sa.Column('review_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('avg_rating', sa.Numeric(precision=4, scale=2), nullable=True),
+    sa.Column('trip_count', sa.Integer(), nullable=False),
+    sa.Column('budget_sum', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('budget_count', sa.Integer(), nullable=False),
+    sa.Column('last_review_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['destination_id'], ['destinations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('destination_id')
+    )
+    op.create_index(op.f('ix_destination_stats_review_count'), 'destination_stats', ['review_count'], unique=False)
+    # Первоначальное заполнение; повторный пересчёт: python -m app.destinations.backfill
+    op.execute("""
+        INSERT INTO destination_stats (
+            destination_id, review_count, rating_sum, avg_rating,
+            trip_count, budget_sum, budget_count, last_review_at
+        )
+        SELECT
+            d.id,
+            COALESCE(r.review_count, 0),
+            COALESCE(r.rating_sum, 0),
+            r.avg_rating,
+            COALESCE(t.trip_count, 0),
+            COALESCE(t.budget_sum, 0),
+            COALESCE(t.budget_count, 0),
+            r.last_review_at
+        FROM destinations d
+        LEFT JOIN (
+            SELECT destination_id, COUNT(id) AS review_count, SUM(rating) AS rating_sum,
+                   ROUND(AVG(rating), 2) AS avg_rating, MAX(created_at) AS last_review_at
+            FROM reviews GROUP BY destination_id
+        ) r ON r.destination_id = d.id
+        LEFT JOIN (
+            SELECT destination_id, COUNT(id) AS trip_count, SUM(budget) AS budget_sum,
+                   COUNT(budget) AS budget_count
+            FROM trips GROUP BY destination_id
+        ) t ON t.destination_id = d.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_destination_stats_review_count'), table_name='destination_stats')
+    op.drop_table('destination_stats')
@@ -0,0 +1,34 @@
+"""destination popularity score
+
+Revision ID: 5d2e8a1f3c90
+Revises: c47a9e2f1d08
+Create Date: 2026-10-18 15:02:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8a1f3c90'
+down_revision: Union[str, None] = 'c47a9e2f1d08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Значения заполнит первый запуск фоновой задачи или python -m app.destinations.backfill
+    op.add_column('destination_stats', sa.Column('popularity_score', sa.Float(), nullable=True))
+    op.create_index(
+        'ix_destination_stats_popularity',
+        'destination_stats',
+        [sa.text('popularity_score DESC'), 'destination_id'],
+        postgresql_where=sa.text('popularity_score IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_destination_stats_popularity', table_name='destination_stats')
+    op.drop_column('destination_stats', 'popularity_score')
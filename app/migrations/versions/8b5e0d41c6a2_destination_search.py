@@ -0,0 +1,53 @@
+"""destination search
+
+Revision ID: 8b5e0d41c6a2
+Revises: 3f1c2a7d9b4e
+Create Date: 2026-10-18 11:02:47.905113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b5e0d41c6a2'
+down_revision: Union[str, None] = '3f1c2a7d9b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('destinations', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(country, '') || ' ' || coalesce(climate, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'C')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_destinations_search_vector', 'destinations', ['search_vector'], unique=False, postgresql_using='gin')
+    # pg_trgm может быть недоступен (нет прав или расширения) — тогда поиск
+    # переключается на индекс в памяти, а миграция не должна падать.
+    op.execute("""
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS ix_destinations_name_trgm
+                ON destinations USING gin (name gin_trgm_ops);
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'pg_trgm unavailable, skipping trigram index: %', SQLERRM;
+        END
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_destinations_name_trgm")
+    op.drop_index('ix_destinations_search_vector', table_name='destinations')
+    op.drop_column('destinations', 'search_vector')
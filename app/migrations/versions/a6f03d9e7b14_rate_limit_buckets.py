@@ -0,0 +1,36 @@
+"""rate limit buckets
+
+Revision ID: a6f03d9e7b14
+Revises: e81b4c7a2d35
+Create Date: 2026-10-18 17:41:55.862019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f03d9e7b14'
+down_revision: Union[str, None] = 'e81b4c7a2d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Нужна только при RATE_LIMIT_BACKEND=postgres
+    op.create_table(
+        'rate_limit_buckets',
+        sa.Column('key', sa.String(length=320), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+        prefixes=['UNLOGGED'],
+    )
+    op.create_index(op.f('ix_rate_limit_buckets_updated_at'), 'rate_limit_buckets', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rate_limit_buckets_updated_at'), table_name='rate_limit_buckets')
+    op.drop_table('rate_limit_buckets')
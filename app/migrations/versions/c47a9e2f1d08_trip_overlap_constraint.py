@@ -0,0 +1,76 @@
+"""trip overlap constraint
+
+Revision ID: c47a9e2f1d08
+Revises: 8b5e0d41c6a2
+Create Date: 2026-10-18 11:48:19.226374
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a9e2f1d08'
+down_revision: Union[str, None] = '8b5e0d41c6a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Пары пересекающихся поездок одного пользователя
+OVERLAPS = sa.text("""
+    SELECT a.user_id, a.id, a.start_date, a.end_date, b.id, b.start_date, b.end_date
+    FROM trips a
+    JOIN trips b
+      ON b.user_id = a.user_id
+     AND b.id > a.id
+     AND tsrange(b.start_date, b.end_date, '[]') && tsrange(a.start_date, a.end_date, '[]')
+    ORDER BY a.user_id, a.id, b.id
+""")
+# Сколько пар выводить в сообщении об ошибке
+OVERLAPS_SHOWN = 50
+
+
+def check_overlaps() -> None:
+    """
+    Раньше пересечения проверялись только в приложении и могли проскочить
+    при гонке. Ограничение на таких данных не создаётся, поэтому миграция
+    останавливается со списком пар, которые нужно разрешить вручную
+    (изменить даты или удалить лишнюю поездку).
+    """
+    if context.is_offline_mode():
+        # В SQL-скрипте (--sql) данных нет: проверку выполнит запуск скрипта
+        return
+    overlaps = op.get_bind().execute(OVERLAPS).all()
+    if not overlaps:
+        return
+    lines = [
+        f"  user_id={user_id}: поездка {a_id} ({a_start} — {a_end}) и поездка {b_id} ({b_start} — {b_end})"
+        for user_id, a_id, a_start, a_end, b_id, b_start, b_end in overlaps[:OVERLAPS_SHOWN]
+    ]
+    if len(overlaps) > OVERLAPS_SHOWN:
+        lines.append(f"  ... и ещё {len(overlaps) - OVERLAPS_SHOWN}")
+    raise RuntimeError(
+        f"Нельзя создать ограничение trips_no_overlap: {len(overlaps)} пар(ы) "
+        "пересекающихся поездок. Разрешите их и повторите миграцию:\n" + "\n".join(lines)
+    )
+
+
+def upgrade() -> None:
+    # btree_gist нужен для оператора = по user_id в GiST-ограничении.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    # Блокирует запись в trips до конца миграции, чтобы между проверкой
+    # и созданием ограничения не появились новые пересечения
+    op.execute("LOCK TABLE trips IN SHARE ROW EXCLUSIVE MODE")
+    check_overlaps()
+    op.create_exclude_constraint(
+        'trips_no_overlap',
+        'trips',
+        ('user_id', '='),
+        (sa.text("tsrange(start_date, end_date, '[]')"), '&&'),
+        using='gist',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('trips_no_overlap', 'trips', type_='exclude')
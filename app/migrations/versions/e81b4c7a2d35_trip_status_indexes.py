@@ -0,0 +1,46 @@
+"""trip status indexes
+
+Revision ID: e81b4c7a2d35
+Revises: 5d2e8a1f3c90
+Create Date: 2026-10-18 16:27:09.104388
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81b4c7a2d35'
+down_revision: Union[str, None] = '5d2e8a1f3c90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_trips_user_id_status', 'trips', ['user_id', 'status'])
+    op.create_index(
+        'ix_trips_planned_start_date',
+        'trips',
+        ['start_date'],
+        postgresql_where=sa.text("status = 'planned'"),
+    )
+    op.create_index(
+        'ix_trips_active_end_date',
+        'trips',
+        ['end_date'],
+        postgresql_where=sa.text("status <> 'completed'"),
+    )
+    # Статусы, записанные при создании и с тех пор устаревшие
+    op.execute("UPDATE trips SET status = 'completed' WHERE status <> 'completed' AND end_date < timezone('utc', now())")
+    op.execute(
+        "UPDATE trips SET status = 'in_progress' WHERE status = 'planned' "
+        "AND start_date <= timezone('utc', now()) AND end_date >= timezone('utc', now())"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trips_active_end_date', table_name='trips')
+    op.drop_index('ix_trips_planned_start_date', table_name='trips')
+    op.drop_index('ix_trips_user_id_status', table_name='trips')
@@ -1,6 +1,7 @@
 from app.users.models import User
 from app.trips.models import Trip
-from app.destinations.models import Destination
+from app.destinations.models import Destination, DestinationStats
 from app.reviews.models import Review
+from app.rate_limit.models import RateLimitBucket
 
-__all__ = ["User", "Trip", "Destination", "Review"]
\ No newline at end of file
+__all__ = ["User", "Trip", "Destination", "Review", "DestinationStats", "RateLimitBucket"]
\ No newline at end of file
@@ -1,9 +1,12 @@
-from datetime import datetime, timedelta
-from typing import Counter
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
+from app.dao.loader import Loaders, get_loaders
 from app.destinations.dao import DestinationDAO
+from app.pages.schemas import SStatistics
+from app.pages.statistics import statistics_cache
+from app.pages.templating import cached_fragments, templates
 from app.reviews.dao import ReviewDAO
 from app.trips.dao import TripDAO
 from app.users.dao import UserDAO
@@ -16,8 +19,6 @@ router = APIRouter(
     tags=["Фронтенд"]
 )
 
-templates = Jinja2Templates(directory="app/templates")
-
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """
@@ -58,27 +59,29 @@ async def create_trip_page(
     Страница создания путешествия доступна только авторизованным пользователям.
     FastAPI автоматически вернет 401 при отсутствии валидного токена.
     """
-    destinations = await DestinationDAO.find_all()
+    fragments = cached_fragments("destinations:trip-options")
+    destinations = [] if fragments else await DestinationDAO.find_all(shape="summary")
     return templates.TemplateResponse("trips/create_trip.html", {
         "request": request,
         "current_user": current_user,
-        "destinations": destinations
+        "destinations": destinations,
+        "cached_fragments": fragments
     })
     
 @router.get("/trips/{trip_id}", response_class=HTMLResponse)
 async def trip_details_page(
     request: Request,
     trip_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """
     Страница с подробной информацией о путешествии.
     """
-    try:
-        trip = await TripDAO.find_by_id(trip_id)
-        destination = await DestinationDAO.find_by_id(trip.destination_id)
-    except UserIsNotPresentException:
+    trip = await loaders[TripDAO].load(trip_id)
+    if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
+    destination = await loaders[DestinationDAO].load(trip.destination_id)
     return templates.TemplateResponse("trips/trip_details.html", {
         "request": request,
         "current_user": current_user,
@@ -111,11 +114,14 @@ async def profile_page(
     Страница профиля доступна только авторизованным пользователям.
     FastAPI автоматически вернет 401 при отсутствии валидного токена.
     """
-    destinations = await DestinationDAO.find_all()  # Fetch destinations here
+    # Список направлений нужен только для ещё не закэшированного фрагмента
+    fragments = cached_fragments("destinations:review-options")
+    destinations = [] if fragments else await DestinationDAO.find_all(shape="summary")
     return templates.TemplateResponse("profile/index.html", {
         "request": request,
         "current_user": current_user,
-        "destinations": destinations  # Pass destinations to the template
+        "destinations": destinations,
+        "cached_fragments": fragments
     })
     
 
@@ -132,13 +138,15 @@ async def destination_details_page(
     try:
         destination = await DestinationDAO.find_by_id(destination_id)
         reviews = await ReviewDAO.find_by_destination_id(destination_id)
+        similar = await DestinationDAO.find_similar(destination_id, limit=4)
     except UserIsNotPresentException:
         raise HTTPException(status_code=404, detail="Destination not found")
     return templates.TemplateResponse("destinations/destination_details.html", {
         "request": request,
         "current_user": current_user,
         "destination": destination,
-        "reviews": reviews
+        "reviews": reviews,
+        "similar": similar
     })
     
 
@@ -147,14 +155,13 @@ async def destination_details_page(
 async def destinations_page(request: Request, current_user: User = Depends(get_current_user)):
     """
     Страница со списком направлений.
+    Сами направления страница загружает через API (/destinations).
     """
-    destinations = await DestinationDAO.find_all()
     return templates.TemplateResponse(
         "destinations/index.html",
         {
             "request": request,
             "current_user": current_user,
-            "destinations": destinations,
         },
     )
 
@@ -162,18 +169,16 @@ async def destinations_page(request: Request, current_user: User = Depends(get_c
 async def review_details_page(
     request: Request,
     review_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """
     Страница с подробной информацией об отзыве.
     """
-    try:
-        review = await ReviewDAO.find_by_id(review_id)
-        if not review:
-            raise HTTPException(status_code=404, detail="Отзыв не найден")
-        destination = await DestinationDAO.find_by_id(review.destination_id)
-    except UserIsNotPresentException:
-        raise HTTPException(status_code=404, detail="Review not found")
+    review = await loaders[ReviewDAO].load(review_id)
+    if not review:
+        raise HTTPException(status_code=404, detail="Отзыв не найден")
+    destination = await loaders[DestinationDAO].load(review.destination_id)
     return templates.TemplateResponse("profile/review_details.html", {
         "request": request,
         "current_user": current_user,
@@ -182,76 +187,42 @@ async def review_details_page(
     })
     
 
+ADMIN_PAGE_SIZE = 50
+
+
 @router.get("/admin", response_class=HTMLResponse)
 async def admin_panel_page(
     request: Request,
+    users_after: Optional[int] = None,
+    destinations_after: Optional[int] = None,
     current_user: User = Depends(get_current_admin_user)  # Используем get_current_admin_user
 ):
     """
     Страница админ панели доступна только администраторам.
+    Таблицы пользователей и направлений выводятся страницами по
+    ADMIN_PAGE_SIZE (keyset-пагинация по id), полные таблицы доступны
+    через потоковые выгрузки.
     """
-    users = await UserDAO.find_all()  # Получаем всех пользователей
-    destinations = await DestinationDAO.find_all()  # Получаем все направления
+    users = await UserDAO.find_page(ADMIN_PAGE_SIZE, after_id=users_after, shape="summary")
+    destinations = await DestinationDAO.find_page(
+        ADMIN_PAGE_SIZE, after_id=destinations_after, shape="card"
+    )
 
     return templates.TemplateResponse("admin/index.html", {
         "request": request,
         "current_user": current_user,
         "users": users,
-        "destinations": destinations
+        "destinations": destinations,
+        "users_after": users_after,
+        "destinations_after": destinations_after,
+        "users_next": users[-1].id if len(users) == ADMIN_PAGE_SIZE else None,
+        "destinations_next": destinations[-1].id if len(destinations) == ADMIN_PAGE_SIZE else None,
     })
     
 
-from collections import Counter
-from datetime import datetime, timedelta
-
-# ... твои импорты ...
-
-@router.get("/statistics")
+@router.get("/statistics", response_model=SStatistics)
 async def get_statistics():
-    # 1. Количество поездок по месяцам за последний год
-    current_date = datetime.now()
-    one_year_ago = current_date - timedelta(days=365) 
-    trips = await TripDAO.find_all()
-
-    trips_per_month = dict(Counter(trip.start_date.month for trip in trips if trip.start_date >= one_year_ago))
-
-    # 2. Топ 5 самых популярных направлений (с количеством поездок)
-    top_destinations = await DestinationDAO.get_popular(limit=5) 
-    #  Преобразуем данные для графика 2
-    top_destinations_data = []
-    for dest in top_destinations:
-        trip_count = len(dest.trips)  #  Получаем количество поездок из списка trips
-        top_destinations_data.append({
-            "name": dest.name,
-            "trip_count": trip_count
-        })
-
-    # 3. Средний рейтинг направлений
-    avg_ratings = {}
-    destinations = await DestinationDAO.find_all()
-    for destination in destinations:
-        avg_rating = await ReviewDAO.get_average_rating(destination.id) 
-        if avg_rating is not None:
-            avg_ratings[destination.name] = avg_rating 
-    # 4. Распределение рейтинга по всем отзывам
-    reviews = await ReviewDAO.find_all()
-    rating_distribution = dict(Counter(review.rating for review in reviews))
-
-    # 5.  Соотношение цены и рейтинга направлений
-    price_rating_relation = []
-    for destination in top_destinations:
-        destination_reviews = await ReviewDAO.find_by_destination_id(destination.id)
-        if destination_reviews:
-            avg_rating = sum(review.rating for review in destination_reviews) / len(destination_reviews)
-            price_rating_relation.append({
-                "price": destination.approximate_price,
-                "rating": avg_rating
-            })
-
-    return {
-        "trips_per_month": trips_per_month,
-        "top_destinations": top_destinations_data,
-        "avg_ratings": avg_ratings,
-        "rating_distribution": rating_distribution,
-        "price_rating_relation": price_rating_relation
-    }
\ No newline at end of file
+    """
+    Статистика для админ панели из снимка в памяти (см. StatisticsCache).
+    """
+    return await statistics_cache.get()
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class STopDestination(BaseModel):
+    name: str
+    trip_count: int
+
+
+class SPriceRating(BaseModel):
+    price: float
+    rating: float
+
+
+class SStatistics(BaseModel):
+    trips_per_month: dict[int, int]
+    top_destinations: list[STopDestination]
+    avg_ratings: dict[str, float]
+    rating_distribution: dict[int, int]
+    price_rating_relation: list[SPriceRating]
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.destinations.dao import DestinationStatsDAO
+from app.response_cache import response_cache
+from app.reviews.dao import ReviewDAO
+from app.trips.dao import TripDAO
+
+logger = logging.getLogger(__name__)
+
+
+async def build_statistics() -> dict:
+    """
+    Собирает данные для графиков админ-панели тремя агрегирующими
+    запросами, которые выполняются параллельно.
+    """
+    one_year_ago = datetime.now() - timedelta(days=365)
+    trips_per_month, rated_destinations, rating_distribution = await asyncio.gather(
+        TripDAO.count_by_month(since=one_year_ago),
+        DestinationStatsDAO.find_rated(),
+        ReviewDAO.get_rating_distribution(),
+    )
+
+    top_destinations = rated_destinations[:5]
+    return {
+        "trips_per_month": trips_per_month,
+        "top_destinations": [
+            {"name": dest.name, "trip_count": dest.trip_count}
+            for dest in top_destinations
+        ],
+        "avg_ratings": {
+            dest.name: float(dest.avg_rating) for dest in rated_destinations
+        },
+        "rating_distribution": rating_distribution,
+        "price_rating_relation": [
+            {"price": float(dest.approximate_price), "rating": float(dest.avg_rating)}
+            for dest in top_destinations
+        ],
+    }
+
+
+class StatisticsCache:
+    """
+    Снимок статистики в памяти процесса. Пока снимок моложе ttl, он отдаётся
+    без обращения к БД; устаревший снимок тоже отдаётся сразу, а обновление
+    запускается в фоне. Ждать БД приходится только до первой сборки.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: dict | None = None
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    @property
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._built_at >= self.ttl
+
+    async def get(self) -> dict:
+        if self._snapshot is None:
+            await self.refresh()
+        elif self.is_stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self.refresh())
+        return self._snapshot
+
+    async def refresh(self, force: bool = False):
+        async with self._lock:
+            # Пока ждали блокировку, снимок мог обновить другой запрос
+            if not force and self._snapshot is not None and not self.is_stale:
+                return
+            self._snapshot = await build_statistics()
+            self._built_at = time.monotonic()
+            # Закэшированный HTTP-ответ /pages/statistics собран из старого снимка
+            response_cache.invalidate("statistics")
+
+    async def refresh_forever(self):
+        """
+        Периодически обновляет снимок, чтобы опрос дашборда не упирался в БД.
+        """
+        while True:
+            try:
+                await self.refresh(force=True)
+            except Exception:
+                logger.exception("Не удалось обновить снимок статистики")
+            await asyncio.sleep(self.ttl)
+
+
+statistics_cache = StatisticsCache(ttl=settings.STATISTICS_CACHE_TTL)
@@ -0,0 +1,99 @@
+import hashlib
+import os
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+import jinja2
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, nodes
+from jinja2.ext import Extension
+
+from app.assets import static_url
+from app.cache import TTLCache
+from app.config import settings
+from app.response_cache import invalidation_listeners
+
+# HTML фрагментов {% cache %}. Ключи совпадают с тегами кэша ответов
+# ("destinations:admin-table"), поэтому запись DAO по тегу "destinations"
+# сбрасывает и фрагменты с этим префиксом.
+fragment_cache = TTLCache(maxsize=settings.FRAGMENT_CACHE_SIZE, ttl=settings.FRAGMENT_CACHE_TTL)
+
+
+def _invalidate_fragments(*tags: str):
+    for tag in tags:
+        fragment_cache.pop_prefix(tag)
+
+
+invalidation_listeners.append(_invalidate_fragments)
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache key, ttl %} ... {% endcache %} — кэширует отрендеренный фрагмент
+    в fragment_cache. ttl в секундах необязателен.
+    """
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        args.append(nodes.ContextReference())
+        return nodes.CallBlock(self.call_method("_cache_fragment", args), [], [], body).set_lineno(lineno)
+
+    def _cache_fragment(self, key, ttl, context, caller):
+        # Фрагмент, найденный обработчиком до запроса данных (cached_fragments),
+        # не перечитывается: к рендеру он мог истечь, а данных для него нет
+        html = context.get("cached_fragments", {}).get(key) or fragment_cache.get(key)
+        if html is None:
+            html = caller()
+            fragment_cache.set(key, html, ttl)
+        return html
+
+
+def cached_fragments(*keys: str) -> dict[str, str]:
+    """
+    Уже отрендеренные фрагменты {% cache %} из keys. Обработчик страницы
+    запрашивает данные фрагмента, только если его здесь нет, и передаёт
+    результат в контекст шаблона как cached_fragments.
+    """
+    fragments = {key: fragment_cache.get(key) for key in keys}
+    return {key: html for key, html in fragments.items() if html is not None}
+
+
+def _bytecode_dir() -> str:
+    """
+    Каталог байткода шаблонов. Jinja различает записи кэша только по
+    исходнику шаблона, а скомпилированный код вызывает методы расширений
+    этого модуля напрямую, поэтому каталог зависит от хэша модуля и версии
+    Jinja: после их изменения шаблоны компилируются заново.
+    """
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update(jinja2.__version__.encode())
+    path = os.path.join(settings.TEMPLATE_BYTECODE_DIR, digest.hexdigest()[:16])
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+
+templates = Jinja2Templates(env=Environment(
+    loader=FileSystemLoader("app/templates"),
+    autoescape=True,
+    # Скомпилированные шаблоны переживают перезапуск и общие для всех воркеров
+    bytecode_cache=FileSystemBytecodeCache(_bytecode_dir()),
+    extensions=[FragmentCacheExtension],
+))
+templates.env.globals["static_url"] = static_url
+
+
+def precompile_templates():
+    """
+    Компилирует все шаблоны при старте, чтобы первый запрос к странице
+    не платил за компиляцию.
+    """
+    for name in templates.env.list_templates(extensions=["html"]):
+        templates.env.get_template(name)
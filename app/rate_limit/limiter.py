@@ -0,0 +1,203 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from fastapi import Request
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import settings
+from app.database import async_session_maker
+from app.exceptions import TooManyRequestsException
+from app.rate_limit.models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Корзина на capacity запросов, которая полностью восполняется за period секунд.
+    """
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+class InMemoryRateLimitBackend:
+    """
+    Корзины токенов в памяти процесса. При нескольких воркерах лимит
+    действует в каждом отдельно; давно не тронутые корзины вытесняются
+    первыми, когда их больше maxsize.
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        # ключ -> (токены, время обновления, время полного восполнения)
+        self._buckets: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+
+    async def consume(self, key: str, limit: RateLimit, cost: float = 1) -> float:
+        now = time.monotonic()
+        tokens, updated_at, _ = self._buckets.pop(key, (limit.capacity, now, now))
+        tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / limit.rate
+        self._buckets[key] = (tokens, now, now + (limit.capacity - tokens) / limit.rate)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def reset(self, key: str):
+        self._buckets.pop(key, None)
+
+    async def cleanup(self) -> int:
+        now = time.monotonic()
+        full = [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for key in full:
+            del self._buckets[key]
+        return len(full)
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class PostgresRateLimitBackend:
+    """
+    Корзины токенов в таблице rate_limit_buckets, общие для всех воркеров.
+    Списание — один UPSERT: строка обновляется, только если после
+    восполнения в корзине хватает токенов. Работает с primary.
+    """
+
+    name = "postgres"
+
+    def __init__(self, idle_ttl: float):
+        # Корзина, не тронутая дольше самого длинного периода, уже полная
+        self.idle_ttl = idle_ttl
+
+    @staticmethod
+    def _refilled(limit: RateLimit):
+        table = RateLimitBucket.__table__
+        elapsed = func.extract("epoch", func.now() - table.c.updated_at)
+        return func.least(limit.capacity, table.c.tokens + elapsed * limit.rate)
+
+    async def consume(self, key: str, limit: RateLimit, cost: float = 1) -> float:
+        refilled = self._refilled(limit)
+        query = pg_insert(RateLimitBucket).values(key=key, tokens=limit.capacity - cost, updated_at=func.now())
+        query = query.on_conflict_do_update(
+            index_elements=[RateLimitBucket.key],
+            set_={"tokens": refilled - cost, "updated_at": func.now()},
+            where=refilled >= cost,
+        ).returning(RateLimitBucket.tokens)
+        async with async_session_maker() as session:
+            consumed = (await session.execute(query)).scalar_one_or_none()
+            if consumed is not None:
+                await session.commit()
+                return 0.0
+            tokens = await session.scalar(select(refilled).where(RateLimitBucket.key == key))
+        return (cost - float(tokens or 0)) / limit.rate
+
+    async def reset(self, key: str):
+        async with async_session_maker() as session:
+            await session.execute(delete(RateLimitBucket).where(RateLimitBucket.key == key))
+            await session.commit()
+
+    async def cleanup(self) -> int:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                delete(RateLimitBucket)
+                .where(RateLimitBucket.updated_at < func.now() - timedelta(seconds=self.idle_ttl))
+            )
+            await session.commit()
+            return result.rowcount
+
+    def size(self) -> int | None:
+        return None
+
+
+class RateLimiter:
+    """
+    Именованные лимиты поверх бэкенда корзин токенов. hit списывает токен из
+    корзины (лимит, ключ) и выбрасывает 429 с Retry-After, если токенов нет.
+    Ошибка бэкенда запрос не блокирует: лимитер пропускает его и пишет в лог.
+    """
+
+    def __init__(self, backend, limits: dict[str, RateLimit]):
+        self.backend = backend
+        self.limits = limits
+        self.allowed = dict.fromkeys(limits, 0)
+        self.limited = dict.fromkeys(limits, 0)
+        self.errors = 0
+
+    async def hit(self, name: str, key: str):
+        try:
+            retry_after = await self.backend.consume(f"{name}:{key}", self.limits[name])
+        except Exception:
+            self.errors += 1
+            logger.exception("Бэкенд ограничения частоты недоступен")
+            return
+        if retry_after > 0:
+            self.limited[name] += 1
+            raise TooManyRequestsException(math.ceil(retry_after))
+        self.allowed[name] += 1
+
+    async def reset(self, name: str, key: str):
+        try:
+            await self.backend.reset(f"{name}:{key}")
+        except Exception:
+            self.errors += 1
+            logger.exception("Бэкенд ограничения частоты недоступен")
+
+    async def cleanup(self) -> int:
+        return await self.backend.cleanup()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "buckets": self.backend.size(),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors,
+        }
+
+
+def client_ip(request: Request) -> str:
+    # За прокси адрес клиента подставляет uvicorn --proxy-headers
+    return request.client.host if request.client else "unknown"
+
+
+AUTH_LIMITS = {
+    "login_ip": RateLimit(*settings.RATE_LIMIT_LOGIN_IP),
+    "login_email": RateLimit(*settings.RATE_LIMIT_LOGIN_EMAIL),
+    "register_ip": RateLimit(*settings.RATE_LIMIT_REGISTER_IP),
+    "register_email": RateLimit(*settings.RATE_LIMIT_REGISTER_EMAIL),
+}
+
+# Бэкенды по имени из настройки RATE_LIMIT_BACKEND
+RATE_LIMIT_BACKENDS = {
+    InMemoryRateLimitBackend.name: lambda: InMemoryRateLimitBackend(),
+    PostgresRateLimitBackend.name: lambda: PostgresRateLimitBackend(
+        idle_ttl=max(limit.period for limit in AUTH_LIMITS.values())
+    ),
+}
+
+
+def get_rate_limit_backend():
+    try:
+        factory = RATE_LIMIT_BACKENDS[settings.RATE_LIMIT_BACKEND]
+    except KeyError:
+        raise ValueError(f"Неизвестный бэкенд ограничения частоты: {settings.RATE_LIMIT_BACKEND}")
+    return factory()
+
+
+auth_limiter = RateLimiter(get_rate_limit_backend(), AUTH_LIMITS)
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class RateLimitBucket(Base):
+    """
+    Корзина токенов общего бэкенда ограничения частоты (RATE_LIMIT_BACKEND=postgres).
+    Таблица UNLOGGED: после сбоя БД корзины просто начинаются заново.
+    """
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String(320), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
@@ -0,0 +1,84 @@
+"""
+Замер времени сборки модели рекомендаций, запроса и инкрементального
+обновления на синтетических данных (без БД) при росте числа пользователей.
+
+Запуск: python -m app.recommendations.benchmark [--users 1000 10000 100000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.recommendations.model import Interactions, ItemSimilarityModel
+
+
+def synthetic_interactions(
+    rng: np.random.Generator,
+    user_ids: np.ndarray,
+    destinations: int,
+    per_user: int
+) -> Interactions:
+    """
+    По per_user взаимодействий на пользователя; популярность направлений
+    распределена по закону Ципфа, как у реального каталога.
+    """
+    popularity = 1.0 / np.arange(1, destinations + 1)
+    popularity /= popularity.sum()
+    destination_ids = rng.choice(destinations, size=(len(user_ids), per_user), p=popularity)
+    users = np.repeat(user_ids, per_user)
+    pairs = np.unique(np.stack([users, destination_ids.ravel()], axis=1), axis=0)
+    values = rng.integers(1, 6, size=len(pairs)).astype(np.float64)
+    return Interactions(pairs[:, 0], pairs[:, 1], values)
+
+
+def measure(users: int, destinations: int, per_user: int, queries: int, dirty: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    interactions = synthetic_interactions(rng, np.arange(users), destinations, per_user)
+
+    started = time.perf_counter()
+    model = ItemSimilarityModel.build(interactions)
+    build = time.perf_counter() - started
+
+    sample = rng.choice(users, size=min(queries, users), replace=False)
+    started = time.perf_counter()
+    for user_id in sample:
+        model.recommend(int(user_id), 10)
+    query = (time.perf_counter() - started) / len(sample)
+
+    dirty_ids = rng.choice(users, size=min(dirty, users), replace=False)
+    changed = synthetic_interactions(rng, dirty_ids, destinations, per_user)
+    started = time.perf_counter()
+    model.update([int(user_id) for user_id in dirty_ids], changed)
+    update = time.perf_counter() - started
+
+    return {
+        "users": users,
+        "interactions": len(interactions.values),
+        "similarity_nnz": model.gram.nnz,
+        "build_s": build,
+        "query_ms": query * 1000,
+        "update_s": update,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--destinations", type=int, default=2_000)
+    parser.add_argument("--per-user", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dirty", type=int, default=100, help="пользователей в инкрементальном обновлении")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'users':>9} {'interactions':>13} {'gram nnz':>10} {'build, s':>9} {'query, ms':>10} {'update, s':>10}")
+    for users in args.users:
+        result = measure(users, args.destinations, args.per_user, args.queries, args.dirty, args.seed)
+        print(
+            f"{result['users']:>9} {result['interactions']:>13} {result['similarity_nnz']:>10} "
+            f"{result['build_s']:>9.3f} {result['query_ms']:>10.3f} {result['update_s']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
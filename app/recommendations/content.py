@@ -0,0 +1,426 @@
+"""
+Индекс похожих направлений по содержанию: TF-IDF названия и описания,
+страна, климат и цена. Индекс хранится в SIMILARITY_INDEX_DIR в виде
+.npy-файлов, которые воркеры открывают через mmap и делят одну копию
+в page cache. Изменения направлений применяются инкрементально; полная
+пересборка (например, чтобы учесть новые слова в словаре):
+
+    python -m app.recommendations.content
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import math
+import os
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session_maker
+from app.destinations.models import Destination
+from app.destinations.search import tokenize
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = (
+    Destination.id,
+    Destination.name,
+    Destination.description,
+    Destination.country,
+    Destination.climate,
+    Destination.approximate_price,
+)
+
+# Вклад групп признаков в косинусную близость
+TEXT_WEIGHT = 1.0
+COUNTRY_WEIGHT = 0.5
+CLIMATE_WEIGHT = 0.7
+PRICE_WEIGHT = 0.6
+PRICE_BINS = 12
+
+# Строк матрицы близостей, которые считаются за один раз
+BLOCK_SIZE = 512
+
+MANIFEST = "index.json"
+ARRAYS = ("ids", "data", "indices", "indptr", "neighbor_ids", "neighbor_scores")
+
+
+def _category(value: str | None) -> str:
+    return (value or "").strip().lower()
+
+
+class ContentFeaturizer:
+    """
+    Вектор направления: TF-IDF слов названия и описания, one-hot страны
+    и климата и цена, размазанная по двум соседним корзинам логарифмической
+    шкалы, чтобы близкие цены давали близкие векторы. Каждая группа
+    нормируется и берётся со своим весом, весь вектор нормируется к единице.
+    """
+
+    def __init__(
+        self,
+        vocabulary: list[str],
+        idf: list[float],
+        countries: list[str],
+        climates: list[str],
+        price_range: tuple[float, float],
+    ):
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.countries = countries
+        self.climates = climates
+        self.price_range = tuple(price_range)
+        self._tokens = {token: idx for idx, token in enumerate(vocabulary)}
+        self._countries = {country: idx for idx, country in enumerate(countries)}
+        self._climates = {climate: idx for idx, climate in enumerate(climates)}
+        self._country_offset = len(vocabulary)
+        self._climate_offset = self._country_offset + len(countries)
+        self._price_offset = self._climate_offset + len(climates)
+        self.dim = self._price_offset + PRICE_BINS
+
+    @staticmethod
+    def _document(row) -> list[str]:
+        return tokenize(f"{row.name} {row.description or ''}")
+
+    @classmethod
+    def fit(cls, rows: list) -> "ContentFeaturizer":
+        document_frequency = Counter()
+        for row in rows:
+            document_frequency.update(set(cls._document(row)))
+        vocabulary = sorted(document_frequency)
+        idf = [math.log((1 + len(rows)) / (1 + document_frequency[token])) + 1 for token in vocabulary]
+        log_prices = [math.log1p(float(row.approximate_price)) for row in rows] or [0.0]
+        return cls(
+            vocabulary,
+            idf,
+            sorted({_category(row.country) for row in rows}),
+            sorted({_category(row.climate) for row in rows}),
+            (min(log_prices), max(log_prices)),
+        )
+
+    def _price_bins(self, price) -> tuple[list[int], list[float]]:
+        low, high = self.price_range
+        position = 0.0
+        if high > low:
+            position = (math.log1p(float(price)) - low) / (high - low) * (PRICE_BINS - 1)
+        position = min(max(position, 0.0), PRICE_BINS - 1)
+        lower = int(position)
+        fraction = position - lower
+        if lower + 1 < PRICE_BINS and fraction > 0:
+            return [lower, lower + 1], [1 - fraction, fraction]
+        return [lower], [1.0]
+
+    def transform(self, rows: list) -> sparse.csr_matrix:
+        data: list[float] = []
+        indices: list[int] = []
+        indptr = [0]
+        for row in rows:
+            groups = []
+            counts = Counter(token for token in self._document(row) if token in self._tokens)
+            if counts:
+                columns = [self._tokens[token] for token in counts]
+                groups.append((columns, np.fromiter(counts.values(), dtype=np.float64) * self.idf[columns], TEXT_WEIGHT))
+            country = self._countries.get(_category(row.country))
+            if country is not None:
+                groups.append(([self._country_offset + country], np.ones(1), COUNTRY_WEIGHT))
+            climate = self._climates.get(_category(row.climate))
+            if climate is not None:
+                groups.append(([self._climate_offset + climate], np.ones(1), CLIMATE_WEIGHT))
+            bins, shares = self._price_bins(row.approximate_price)
+            groups.append(([self._price_offset + bin_ for bin_ in bins], np.asarray(shares), PRICE_WEIGHT))
+
+            row_columns, row_values = [], []
+            for columns, values, weight in groups:
+                row_columns.extend(columns)
+                row_values.append(values / np.linalg.norm(values) * weight)
+            values = np.concatenate(row_values)
+            data.extend(values / np.linalg.norm(values))
+            indices.extend(row_columns)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(rows), self.dim),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "vocabulary": self.vocabulary,
+            "idf": self.idf.tolist(),
+            "countries": self.countries,
+            "climates": self.climates,
+            "price_range": list(self.price_range),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ContentFeaturizer":
+        return cls(**data)
+
+
+def top_neighbors(features: sparse.csr_matrix, ids: np.ndarray, positions: np.ndarray, k: int):
+    """
+    Для строк positions — k самых близких других направлений: таблицы id
+    (-1, если соседей меньше k) и косинусных близостей.
+    """
+    neighbor_ids = np.full((len(positions), k), -1, dtype=np.int64)
+    neighbor_scores = np.zeros((len(positions), k), dtype=np.float32)
+    count = min(k, features.shape[0] - 1)
+    if count <= 0:
+        return neighbor_ids, neighbor_scores
+    transposed = features.T.tocsr()
+    for start in range(0, len(positions), BLOCK_SIZE):
+        block = positions[start:start + BLOCK_SIZE]
+        similarities = (features[block] @ transposed).toarray()
+        similarities[np.arange(len(block)), block] = -np.inf
+        nearest = np.argpartition(-similarities, count - 1, axis=1)[:, :count]
+        scores = np.take_along_axis(similarities, nearest, axis=1)
+        order = np.argsort(-scores, axis=1, kind="stable")
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        found = scores > 0
+        neighbor_ids[start:start + len(block), :count] = np.where(found, ids[nearest], -1)
+        neighbor_scores[start:start + len(block), :count] = np.where(found, scores, 0)
+    return neighbor_ids, neighbor_scores
+
+
+@dataclass
+class ContentIndexData:
+    # Все массивы упорядочены по возрастанию ids
+    ids: np.ndarray
+    features: sparse.csr_matrix
+    neighbor_ids: np.ndarray
+    neighbor_scores: np.ndarray
+    featurizer: ContentFeaturizer
+
+    @classmethod
+    def build(cls, rows: list, k: int) -> "ContentIndexData":
+        rows = sorted(rows, key=lambda row: row.id)
+        featurizer = ContentFeaturizer.fit(rows)
+        ids = np.asarray([row.id for row in rows], dtype=np.int64)
+        features = featurizer.transform(rows)
+        neighbor_ids, neighbor_scores = top_neighbors(features, ids, np.arange(len(ids)), k)
+        return cls(ids, features, neighbor_ids, neighbor_scores, featurizer)
+
+    def update(self, changed_ids: Iterable[int], rows: list) -> "ContentIndexData":
+        """
+        Новый индекс с пересчитанными векторами направлений changed_ids
+        (rows — их текущие строки; направления без строки удалены). Списки
+        соседей пересчитываются только у изменённых направлений и у тех,
+        на чьих соседей изменения могли повлиять. Словарь и категории не
+        меняются до полной пересборки.
+        """
+        changed = np.unique(np.asarray(list(changed_ids), dtype=np.int64))
+        keep = ~np.isin(self.ids, changed)
+        rows = sorted(rows, key=lambda row: row.id)
+        new_ids = np.asarray([row.id for row in rows], dtype=np.int64)
+        k = self.neighbor_ids.shape[1]
+
+        ids = np.concatenate([self.ids[keep], new_ids])
+        features = sparse.vstack([self.features[keep], self.featurizer.transform(rows)], format="csr")
+        neighbor_ids = np.concatenate([self.neighbor_ids[keep], np.full((len(rows), k), -1, dtype=np.int64)])
+        neighbor_scores = np.concatenate([self.neighbor_scores[keep], np.zeros((len(rows), k), dtype=np.float32)])
+        order = np.argsort(ids, kind="stable")
+        ids, features = ids[order], features[order]
+        neighbor_ids, neighbor_scores = neighbor_ids[order], neighbor_scores[order]
+
+        changed_positions = np.searchsorted(ids, new_ids)
+        # Соседи, которые изменились или исчезли
+        affected = np.isin(neighbor_ids, changed).any(axis=1)
+        if len(changed_positions):
+            # Изменённое направление может войти в top-k: близость выше k-й
+            similarities = (features @ features[changed_positions].T).toarray()
+            similarities[changed_positions, np.arange(len(changed_positions))] = -np.inf
+            kth = np.where(neighbor_ids[:, -1] >= 0, neighbor_scores[:, -1], 0)
+            affected |= (similarities > kth[:, None]).any(axis=1)
+            affected[changed_positions] = True
+        positions = np.flatnonzero(affected)
+        if len(positions):
+            neighbor_ids[positions], neighbor_scores[positions] = top_neighbors(features, ids, positions, k)
+        return ContentIndexData(ids, features, neighbor_ids, neighbor_scores, self.featurizer)
+
+    def save(self, directory: Path, version: int):
+        # Одинаковый тип индексов, чтобы scipy при загрузке не копировал массивы
+        index_dtype = np.int32 if self.features.nnz < 2 ** 31 else np.int64
+        arrays = {
+            "ids": self.ids,
+            "data": self.features.data,
+            "indices": self.features.indices.astype(index_dtype, copy=False),
+            "indptr": self.features.indptr.astype(index_dtype, copy=False),
+            "neighbor_ids": self.neighbor_ids,
+            "neighbor_scores": self.neighbor_scores,
+        }
+        for name, array in arrays.items():
+            np.save(directory / f"{name}.{version}.npy", np.ascontiguousarray(array))
+        manifest = {
+            "version": version,
+            "shape": list(self.features.shape),
+            "featurizer": self.featurizer.to_dict(),
+        }
+        tmp_path = directory / f"{MANIFEST}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(manifest))
+        os.replace(tmp_path, directory / MANIFEST)
+        # Предыдущую версию могут ещё читать другие воркеры; более старые удаляются
+        for path in directory.glob("*.*.npy"):
+            file_version = path.suffixes[-2].lstrip(".")
+            if file_version.isdigit() and int(file_version) < version - 1:
+                path.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, directory: Path) -> tuple["ContentIndexData", int]:
+        manifest = json.loads((directory / MANIFEST).read_text())
+        version = manifest["version"]
+        arrays = {
+            name: np.load(directory / f"{name}.{version}.npy", mmap_mode="r")
+            for name in ARRAYS
+        }
+        features = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=tuple(manifest["shape"]),
+            copy=False,
+        )
+        data = cls(
+            arrays["ids"],
+            features,
+            arrays["neighbor_ids"],
+            arrays["neighbor_scores"],
+            ContentFeaturizer.from_dict(manifest["featurizer"]),
+        )
+        return data, version
+
+
+class ContentIndex:
+    """
+    Индекс похожих направлений, общий для воркеров через файлы в directory.
+    Запись (полная сборка или инкрементальное обновление) идёт под файловой
+    блокировкой; остальные воркеры замечают новую версию по манифесту и
+    переоткрывают файлы.
+    """
+
+    def __init__(self, directory: str, k: int):
+        self.directory = Path(directory)
+        self.k = k
+        self._data: ContentIndexData | None = None
+        self._version = 0
+        self._manifest_mtime: int | None = None
+        self._pending: set[int] = set()
+        self._task: asyncio.Task | None = None
+
+    @contextmanager
+    def _file_lock(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "index.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reload_if_changed(self):
+        try:
+            mtime = (self.directory / MANIFEST).stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._manifest_mtime:
+            self._data, self._version = ContentIndexData.load(self.directory)
+            self._manifest_mtime = mtime
+
+    @staticmethod
+    async def _load_rows(destination_ids: Iterable[int] | None = None) -> list:
+        async with async_session_maker() as session:
+            query = select(*FEATURE_COLUMNS)
+            if destination_ids is not None:
+                query = query.where(Destination.id.in_(list(destination_ids)))
+            result = await session.execute(query)
+            return result.all()
+
+    def _write(self, data: ContentIndexData):
+        data.save(self.directory, self._version + 1)
+        self._reload_if_changed()
+
+    async def rebuild(self):
+        rows = await self._load_rows()
+
+        def build():
+            with self._file_lock():
+                self._reload_if_changed()
+                self._write(ContentIndexData.build(rows, self.k))
+
+        await asyncio.to_thread(build)
+
+    async def ensure(self):
+        """
+        Открывает индекс при старте воркера и собирает его, если файлов ещё нет.
+        """
+        try:
+            await asyncio.to_thread(self._reload_if_changed)
+            if self._data is None:
+                await self.rebuild()
+        except Exception:
+            logger.exception("Не удалось открыть индекс похожих направлений")
+
+    def mark_changed(self, *destination_ids: int):
+        """
+        Ставит направления в очередь инкрементального обновления. Процессы,
+        не открывавшие индекс (скрипты), изменения не применяют.
+        """
+        if self._data is None:
+            return
+        self._pending.update(destination_ids)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._apply_pending())
+
+    async def _apply_pending(self):
+        while self._pending:
+            destination_ids, self._pending = self._pending, set()
+            try:
+                rows = await self._load_rows(destination_ids)
+
+                def update():
+                    with self._file_lock():
+                        # Другой воркер мог записать версию новее нашей
+                        self._reload_if_changed()
+                        self._write(self._data.update(destination_ids, rows))
+
+                await asyncio.to_thread(update)
+            except Exception:
+                logger.exception("Не удалось обновить индекс похожих направлений")
+
+    def similar(self, destination_id: int, limit: int) -> list[tuple[int, float]]:
+        """
+        До limit похожих направлений: пары (id направления, близость).
+        """
+        self._reload_if_changed()
+        data = self._data
+        if data is None or not len(data.ids):
+            return []
+        position = int(np.searchsorted(data.ids, destination_id))
+        if position >= len(data.ids) or data.ids[position] != destination_id:
+            return []
+        return [
+            (int(neighbor_id), float(score))
+            for neighbor_id, score in zip(data.neighbor_ids[position, :limit], data.neighbor_scores[position, :limit])
+            if neighbor_id >= 0
+        ]
+
+    def stats(self) -> dict:
+        data = self._data
+        return {
+            "version": self._version,
+            "destinations": len(data.ids) if data else 0,
+            "vocabulary": len(data.featurizer.vocabulary) if data else 0,
+            "pending": len(self._pending),
+        }
+
+
+content_index = ContentIndex(settings.SIMILARITY_INDEX_DIR, k=settings.SIMILARITY_TOP_K)
+
+
+if __name__ == "__main__":
+    asyncio.run(content_index.rebuild())
@@ -0,0 +1,55 @@
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import Float, Integer, cast, func, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import session_scope
+from app.recommendations.model import Interactions
+from app.reviews.models import Review
+from app.trips.models import Trip
+
+
+class InteractionDAO:
+    """
+    Взаимодействия пользователей с направлениями для рекомендаций: оценка
+    из отзыва, а если отзыва нет, но была поездка, — RECOMMENDATIONS_TRIP_WEIGHT.
+    """
+
+    @staticmethod
+    def _query(user_ids: Iterable[int] | None = None):
+        reviews = select(Review.user_id, Review.destination_id, Review.rating)
+        trips = select(Trip.user_id, Trip.destination_id, cast(null(), Integer))
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            reviews = reviews.where(Review.user_id.in_(user_ids))
+            trips = trips.where(Trip.user_id.in_(user_ids))
+        interactions = union_all(reviews, trips).subquery()
+        return (
+            select(
+                interactions.c.user_id,
+                interactions.c.destination_id,
+                func.coalesce(
+                    cast(func.max(interactions.c.rating), Float),
+                    settings.RECOMMENDATIONS_TRIP_WEIGHT,
+                ),
+            )
+            .group_by(interactions.c.user_id, interactions.c.destination_id)
+        )
+
+    @classmethod
+    async def stream(
+        cls,
+        user_ids: Iterable[int] | None = None,
+        batch_size: int = 10000,
+        session: AsyncSession | None = None
+    ) -> AsyncIterator[Interactions]:
+        """
+        Взаимодействия всех пользователей (или только user_ids) пачками
+        через серверный курсор.
+        """
+        async with session_scope(session) as session:
+            query = cls._query(user_ids).execution_options(yield_per=batch_size)
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                yield Interactions.from_rows(partition)
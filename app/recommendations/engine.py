@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import after_commit, primary_reads
+from app.recommendations.dao import InteractionDAO
+from app.recommendations.model import Interactions, ItemSimilarityModel
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationEngine:
+    """
+    Модель рекомендаций в памяти процесса. Полностью собирается при первом
+    запросе и раз в rebuild_interval секунд. Между сборками пользователи,
+    у которых изменились отзывы или поездки (mark_dirty после коммита),
+    пересчитываются инкрементально раз в refresh_interval секунд, а также
+    перед ответом им самим.
+    """
+
+    def __init__(self, refresh_interval: float, rebuild_interval: float):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._model: ItemSimilarityModel | None = None
+        self._built_at = 0.0
+        self._dirty: set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def mark_dirty(self, *user_ids: int):
+        self._dirty.update(user_ids)
+
+    @staticmethod
+    async def _load(user_ids: list[int] | None = None) -> Interactions:
+        if user_ids is None:
+            return Interactions.concat([part async for part in InteractionDAO.stream()])
+        # Пользователи помечены после коммита: реплика могла его ещё не получить
+        with primary_reads():
+            return Interactions.concat([part async for part in InteractionDAO.stream(user_ids)])
+
+    async def rebuild(self, force: bool = True):
+        async with self._lock:
+            if not force and self._model is not None:
+                return
+            # Изменения, пришедшие во время сборки, применит следующий refresh
+            pending, self._dirty = self._dirty, set()
+            try:
+                interactions = await self._load()
+                self._model = await asyncio.to_thread(ItemSimilarityModel.build, interactions)
+            except BaseException:
+                self._dirty |= pending
+                raise
+            self._built_at = time.monotonic()
+
+    async def refresh(self):
+        async with self._lock:
+            if self._model is None or not self._dirty:
+                return
+            pending, self._dirty = self._dirty, set()
+            user_ids = list(pending)
+            try:
+                interactions = await self._load(user_ids)
+                self._model = await asyncio.to_thread(self._model.update, user_ids, interactions)
+            except BaseException:
+                self._dirty |= pending
+                raise
+
+    async def get_model(self) -> ItemSimilarityModel:
+        if self._model is None:
+            await self.rebuild(force=False)
+        return self._model
+
+    async def recommend(self, user_id: int, limit: int) -> list[tuple[int, float]]:
+        """
+        До limit рекомендованных направлений: пары (id направления, оценка).
+        """
+        model = await self.get_model()
+        if user_id in self._dirty:
+            await self.refresh()
+            model = self._model
+        return model.recommend(user_id, limit)
+
+    def seen(self, user_id: int) -> set[int]:
+        """
+        Направления, с которыми пользователь уже взаимодействовал (по модели).
+        """
+        model = self._model
+        vector = model.user_vectors.get(user_id) if model else None
+        if vector is None:
+            return set()
+        return {int(destination_id) for destination_id in model.destination_ids[vector[0]]}
+
+    def stats(self) -> dict:
+        model = self._model
+        return {
+            "built": model is not None,
+            "users": model.user_count if model else 0,
+            "destinations": len(model.destination_ids) if model else 0,
+            "similarity_nnz": model.gram.nnz if model else 0,
+            "dirty_users": len(self._dirty),
+            "age_seconds": round(time.monotonic() - self._built_at, 1) if model else None,
+        }
+
+    async def refresh_forever(self):
+        """
+        Периодически применяет накопившиеся изменения и пересобирает модель.
+        """
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if time.monotonic() - self._built_at >= self.rebuild_interval:
+                    await self.rebuild()
+                else:
+                    await self.refresh()
+            except Exception:
+                logger.exception("Не удалось обновить модель рекомендаций")
+
+
+recommendation_engine = RecommendationEngine(
+    refresh_interval=settings.RECOMMENDATIONS_REFRESH_INTERVAL,
+    rebuild_interval=settings.RECOMMENDATIONS_REBUILD_INTERVAL,
+)
+
+
+def refresh_recommendations_on_commit(session: AsyncSession, *user_ids: int):
+    """
+    Помечает пользователей для пересчёта рекомендаций после коммита транзакции.
+    """
+    after_commit(session, lambda: recommendation_engine.mark_dirty(*user_ids))
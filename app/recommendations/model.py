@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+
+import numpy as np
+from scipy import sparse
+
+
+@dataclass(frozen=True)
+class Interactions:
+    """
+    Оценки пользователей в виде трёх параллельных массивов: пользователь,
+    направление, вес взаимодействия.
+    """
+    user_ids: np.ndarray
+    destination_ids: np.ndarray
+    values: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows) -> "Interactions":
+        if not rows:
+            return cls.empty()
+        user_ids, destination_ids, values = zip(*rows)
+        return cls(
+            np.asarray(user_ids, dtype=np.int64),
+            np.asarray(destination_ids, dtype=np.int64),
+            np.asarray(values, dtype=np.float64),
+        )
+
+    @classmethod
+    def empty(cls) -> "Interactions":
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+
+    @classmethod
+    def concat(cls, parts: list["Interactions"]) -> "Interactions":
+        if not parts:
+            return cls.empty()
+        return cls(
+            np.concatenate([part.user_ids for part in parts]),
+            np.concatenate([part.destination_ids for part in parts]),
+            np.concatenate([part.values for part in parts]),
+        )
+
+
+class ItemSimilarityModel:
+    """
+    Item-item коллаборативная фильтрация по косинусной близости направлений.
+
+    Хранится разреженная матрица Грама G = Rᵀ·R (R — матрица пользователь ×
+    направление) и векторы пользователей. Близость направлений i и j равна
+    G[i, j] / (n_i · n_j), где n = sqrt(diag G), поэтому оценка направления j
+    для пользователя u — (r_u / n) · G[:, j] / n_j: одно умножение разреженной
+    строки на G без построения матрицы близостей.
+
+    Изменение оценок пользователя меняет G на r_newᵀ·r_new − r_oldᵀ·r_old,
+    так что обновление стоит пропорционально числу изменившихся пользователей,
+    а не размеру данных. Экземпляр не изменяется: update возвращает новую
+    модель, и запросы могут читать старую, пока строится новая.
+    """
+
+    def __init__(
+        self,
+        destination_ids: np.ndarray,
+        gram: sparse.csr_matrix,
+        user_vectors: dict[int, tuple[np.ndarray, np.ndarray]],
+    ):
+        self.destination_ids = destination_ids
+        self.gram = gram
+        self.user_vectors = user_vectors
+        self.norms = np.sqrt(np.maximum(gram.diagonal(), 0.0))
+
+    @property
+    def user_count(self) -> int:
+        return len(self.user_vectors)
+
+    @staticmethod
+    def _user_matrix(
+        interactions: Interactions,
+        destination_ids: np.ndarray
+    ) -> tuple[np.ndarray, sparse.csr_matrix]:
+        """
+        Разреженная матрица пользователь × направление и id пользователей её строк.
+        Колонка направления — его позиция в destination_ids.
+        """
+        users, rows = np.unique(interactions.user_ids, return_inverse=True)
+        order = np.argsort(destination_ids, kind="stable")
+        columns = order[np.searchsorted(destination_ids, interactions.destination_ids, sorter=order)]
+        matrix = sparse.csr_matrix(
+            (interactions.values, (rows, columns)), shape=(len(users), len(destination_ids))
+        )
+        return users, matrix
+
+    @staticmethod
+    def _split_rows(users: np.ndarray, matrix: sparse.csr_matrix) -> dict:
+        return {
+            int(user_id): (
+                matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]].copy(),
+                matrix.data[matrix.indptr[row]:matrix.indptr[row + 1]].copy(),
+            )
+            for row, user_id in enumerate(users)
+        }
+
+    @classmethod
+    def build(cls, interactions: Interactions) -> "ItemSimilarityModel":
+        destination_ids = np.unique(interactions.destination_ids)
+        users, matrix = cls._user_matrix(interactions, destination_ids)
+        gram = (matrix.T @ matrix).tocsr()
+        return cls(destination_ids, gram, cls._split_rows(users, matrix))
+
+    def update(self, user_ids, interactions: Interactions) -> "ItemSimilarityModel":
+        """
+        Новая модель, в которой векторы пользователей user_ids заменены
+        их текущими взаимодействиями interactions (пустыми — если их больше нет).
+        """
+        new_ids = np.setdiff1d(np.unique(interactions.destination_ids), self.destination_ids)
+        # Новые направления добавляются в конец, позиции старых не меняются
+        destination_ids = np.concatenate([self.destination_ids, new_ids])
+        size = len(destination_ids)
+
+        gram = self.gram.copy()
+        gram.resize((size, size))
+
+        old_vectors = [self.user_vectors[user_id] for user_id in user_ids if user_id in self.user_vectors]
+        if old_vectors:
+            old = sparse.csr_matrix((
+                np.concatenate([values for _, values in old_vectors]),
+                np.concatenate([columns for columns, _ in old_vectors]),
+                np.cumsum([0] + [len(columns) for columns, _ in old_vectors]),
+            ), shape=(len(old_vectors), size))
+            gram = gram - old.T @ old
+
+        users, matrix = self._user_matrix(interactions, destination_ids)
+        gram = (gram + matrix.T @ matrix).tocsr()
+        # Вычитание оставляет явные нули и погрешность округления
+        gram.data[np.abs(gram.data) < 1e-9] = 0.0
+        gram.eliminate_zeros()
+
+        user_vectors = dict(self.user_vectors)
+        for user_id in user_ids:
+            user_vectors.pop(user_id, None)
+        user_vectors.update(self._split_rows(users, matrix))
+        return ItemSimilarityModel(destination_ids, gram, user_vectors)
+
+    def recommend(self, user_id: int, limit: int) -> list[tuple[int, float]]:
+        """
+        До limit направлений с наибольшей оценкой для пользователя, кроме тех,
+        с которыми он уже взаимодействовал: пары (id направления, оценка).
+        """
+        vector = self.user_vectors.get(user_id)
+        if vector is None:
+            return []
+        columns, values = vector
+        norms = self.norms[columns]
+        weights = np.divide(values, norms, out=np.zeros_like(values), where=norms > 0)
+        scores = np.asarray(self.gram[columns].T @ weights).ravel()
+        np.divide(scores, self.norms, out=scores, where=self.norms > 0)
+        scores[self.norms == 0] = 0.0
+        scores[columns] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [
+            (int(self.destination_ids[idx]), float(scores[idx]))
+            for idx in candidates
+        ]
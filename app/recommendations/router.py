@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.destinations.dao import DestinationDAO
+from app.recommendations.engine import recommendation_engine
+from app.recommendations.schemas import SRecommendedDestination
+from app.users.dependencies import get_current_user
+from app.users.models import User
+
+router = APIRouter(
+    prefix="/recommendations",
+    tags=["Рекомендации"]
+)
+
+
+@router.get("/me", response_model=list[SRecommendedDestination])
+async def get_my_recommendations(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Рекомендации для текущего пользователя по похожести направлений, которые
+    он оценил или посетил. Если похожих направлений не хватает (например, у
+    нового пользователя), список дополняется популярными направлениями,
+    которые пользователь ещё не оценивал.
+    """
+    scores = dict(await recommendation_engine.recommend(current_user.id, limit))
+    if len(scores) < limit:
+        skip = recommendation_engine.seen(current_user.id) | scores.keys()
+        popular = await DestinationDAO.get_popular(limit=limit + len(skip), shape="summary")
+        for destination in popular:
+            if len(scores) >= limit:
+                break
+            if destination.id not in skip:
+                scores[destination.id] = 0.0
+
+    rows = await DestinationDAO.find_by_ids(scores, shape="full")
+    return [
+        {**rows[destination_id]._asdict(), "score": round(score, 4)}
+        for destination_id, score in scores.items()
+        if destination_id in rows
+    ]
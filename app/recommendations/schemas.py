@@ -0,0 +1,6 @@
+from app.destinations.schemas import SDestination
+
+
+class SRecommendedDestination(SDestination):
+    # 0 — направление добавлено из популярных, а не по похожести
+    score: float
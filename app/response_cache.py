@@ -0,0 +1,227 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import after_commit, primary_pinned
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    headers: list[tuple[bytes, bytes]]
+    etag: bytes
+    tags: frozenset[str]
+    expires_at: float
+
+
+def _destinations_tags(match, params):
+    tags = {"destinations"}
+    # Фильтр по бюджету зависит от статистики поездок
+    if "min_budget" in params or "max_budget" in params:
+        tags.add("destinations:budget")
+    return tags
+
+
+# Публичные GET-эндпоинты, ответы которых кэшируются, и теги, по которым
+# записи сбрасываются при изменениях в DAO
+CACHE_RULES = [
+    (re.compile(r"^/destinations$"), _destinations_tags),
+    (re.compile(r"^/destinations/popular$"), lambda match, params: {"popular"}),
+    (re.compile(r"^/destinations/(?P<id>\d+)$"), lambda match, params: {f"destination:{match['id']}"}),
+    (
+        re.compile(r"^/reviews/destination/(?P<id>\d+)$"),
+        lambda match, params: {"reviews", f"destination:{match['id']}", f"destination-reviews:{match['id']}"},
+    ),
+    (re.compile(r"^/pages/statistics$"), lambda match, params: {"statistics"}),
+]
+
+
+class ResponseCache:
+    """
+    Кэш готовых ответов в памяти процесса с индексом по тегам.
+    Запись живёт до сброса по тегу или не дольше ttl (для остальных воркеров).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+        # Увеличивается при каждом сбросе: ответ, собранный до сброса, не сохраняется
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, body: bytes, headers: list, tags: set[str], version: int) -> CachedResponse:
+        entry = CachedResponse(
+            body=body,
+            headers=headers,
+            etag=b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"',
+            tags=frozenset(tags),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        if version != self.version or self.maxsize <= 0:
+            return entry
+        self._remove(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, *tags: str):
+        self.version += 1
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, ()):
+                self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache(maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL)
+
+
+# Другие кэши (например, фрагменты шаблонов), сбрасываемые по тем же тегам
+invalidation_listeners = []
+
+
+def invalidate_tags(*tags: str):
+    response_cache.invalidate(*tags)
+    for listener in invalidation_listeners:
+        listener(*tags)
+
+
+def invalidate_on_commit(session: AsyncSession, *tags: str):
+    """
+    Сбрасывает закэшированные ответы с тегами tags после коммита транзакции.
+    """
+    after_commit(session, lambda: invalidate_tags(*tags))
+
+
+def _etag_matches(if_none_match: bytes | None, etag: bytes) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(b",")]
+    # If-None-Match сравнивается слабо: W/"x" совпадает с "x"
+    return b"*" in candidates or any(value.removeprefix(b"W/") == etag for value in candidates)
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI-middleware для CACHE_RULES: отдаёт ответы из response_cache со строгим
+    ETag, отвечает 304 на совпавший If-None-Match и выставляет Cache-Control,
+    чтобы браузеры и CDN перепроверяли ответ, а не скачивали его заново.
+    """
+
+    CACHE_CONTROL = b"public, max-age=0, must-revalidate"
+
+    def __init__(self, app, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        # Запрос, привязанный к primary после записи, не должен получить
+        # ответ, собранный по отстающей реплике
+        if scope["type"] != "http" or scope["method"] != "GET" or primary_pinned():
+            return await self.app(scope, receive, send)
+        for pattern, get_tags in CACHE_RULES:
+            match = pattern.match(scope["path"])
+            if match:
+                break
+        else:
+            return await self.app(scope, receive, send)
+
+        params = sorted(
+            (name, value)
+            for name, value in parse_qsl(scope["query_string"].decode("latin-1"))
+            if value != ""
+        )
+        key = f"{scope['path']}?{urlencode(params)}"
+        if_none_match = dict(scope["headers"]).get(b"if-none-match")
+
+        entry = self.cache.get(key)
+        if entry is None:
+            version = self.cache.version
+            start, body = None, []
+
+            async def capture(message):
+                nonlocal start
+                if message["type"] == "http.response.start":
+                    start = message
+                else:
+                    body.append(message.get("body", b""))
+
+            await self.app(scope, receive, capture)
+            cacheable = start["status"] == 200 and not any(
+                name.lower() == b"set-cookie" for name, _ in start["headers"]
+            )
+            if not cacheable:
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(body)})
+                return
+            headers = [
+                (name, value) for name, value in start["headers"]
+                if name.lower() not in (b"content-length", b"etag", b"cache-control")
+            ]
+            entry = self.cache.set(key, b"".join(body), headers, get_tags(match, dict(params)), version)
+
+        if _etag_matches(if_none_match, entry.etag):
+            self.cache.not_modified += 1
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", entry.etag), (b"cache-control", self.CACHE_CONTROL)],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                *entry.headers,
+                (b"content-length", str(len(entry.body)).encode()),
+                (b"etag", entry.etag),
+                (b"cache-control", self.CACHE_CONTROL),
+            ],
+        })
+        await send({"type": "http.response.body", "body": entry.body})
@@ -1,20 +1,63 @@
-from typing import List
-
-from sqlalchemy import func, select, update
+from sqlalchemy import delete, func, insert, select, update
 from app.dao.base import BaseDAO
+from app.destinations.dao import DestinationStatsDAO
+from app.destinations.models import DestinationStats
 from app.reviews.models import Review
-from app.reviews.schemas import SReviewOut
-from app.database import async_session_maker
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import session_scope
+from app.recommendations.engine import refresh_recommendations_on_commit
+from app.response_cache import invalidate_on_commit
 from app.users.models import User
 
 
 class ReviewDAO(BaseDAO):
     
     model = Review
+
+    SHAPES = {
+        "full": (
+            Review.id,
+            Review.user_id,
+            Review.destination_id,
+            Review.rating,
+            Review.comment,
+            Review.created_at,
+        ),
+    }
+
+    @staticmethod
+    def cache_tags(destination_id: int) -> tuple[str, ...]:
+        """
+        Теги закэшированных ответов, зависящих от отзывов направления.
+        """
+        return ("popular", "statistics", f"destination-reviews:{destination_id}")
     
     @classmethod
-    async def update(cls, id: int, **data):
-        async with async_session_maker() as session:
+    async def add(cls, session: AsyncSession | None = None, **data):
+        async with session_scope(session, commit=True) as session:
+            query = (
+                insert(cls.model)
+                .values(**data)
+                .returning(cls.model.user_id, cls.model.destination_id, cls.model.rating, cls.model.created_at)
+            )
+            review = (await session.execute(query)).one()
+            invalidate_on_commit(session, *cls.cache_tags(review.destination_id))
+            refresh_recommendations_on_commit(session, review.user_id)
+            await DestinationStatsDAO.apply_delta(
+                session,
+                review.destination_id,
+                last_review_at=review.created_at,
+                **DestinationStatsDAO.review_delta(review.rating)
+            )
+
+    @classmethod
+    async def update(cls, id: int, session: AsyncSession | None = None, **data):
+        async with session_scope(session, commit=True) as session:
+            old = (await session.execute(
+                select(cls.model.destination_id, cls.model.rating)
+                .where(cls.model.id == id)
+                .with_for_update()
+            )).one_or_none()
             query = (
                 update(cls.model)
                 .where(cls.model.id == id)
@@ -22,8 +65,43 @@ class ReviewDAO(BaseDAO):
                 .returning(cls.model)
             )
             result = await session.execute(query)
-            await session.commit()
-            return result.scalar_one_or_none()
+            review = result.scalar_one_or_none()
+            if old and review:
+                invalidate_on_commit(
+                    session, *cls.cache_tags(old.destination_id), *cls.cache_tags(review.destination_id)
+                )
+                refresh_recommendations_on_commit(session, review.user_id)
+                if old.destination_id != review.destination_id:
+                    await DestinationStatsDAO.apply_delta(
+                        session, old.destination_id, refresh_last_review=True,
+                        **DestinationStatsDAO.review_delta(old.rating, sign=-1)
+                    )
+                    await DestinationStatsDAO.apply_delta(
+                        session, review.destination_id, last_review_at=review.created_at,
+                        **DestinationStatsDAO.review_delta(review.rating)
+                    )
+                elif old.rating != review.rating:
+                    await DestinationStatsDAO.apply_delta(
+                        session, review.destination_id, rating_sum=review.rating - old.rating
+                    )
+            return review
+
+    @classmethod
+    async def delete(cls, id, session: AsyncSession | None = None):
+        async with session_scope(session, commit=True) as session:
+            query = (
+                delete(cls.model)
+                .where(cls.model.id == id)
+                .returning(cls.model.user_id, cls.model.destination_id, cls.model.rating)
+            )
+            review = (await session.execute(query)).one_or_none()
+            if review:
+                invalidate_on_commit(session, *cls.cache_tags(review.destination_id))
+                refresh_recommendations_on_commit(session, review.user_id)
+                await DestinationStatsDAO.apply_delta(
+                    session, review.destination_id, refresh_last_review=True,
+                    **DestinationStatsDAO.review_delta(review.rating, sign=-1)
+                )
     
     @classmethod
     async def find_all(
@@ -31,9 +109,10 @@ class ReviewDAO(BaseDAO):
         where_clause=None,
         order_by=None,
         offset=None,
-        limit=None
+        limit=None,
+        session: AsyncSession | None = None
     ):
-        async with async_session_maker() as session:
+        async with session_scope(session) as session:
             query = select(cls.model)
             if where_clause:
                 for key, value in where_clause.items():
@@ -48,30 +127,23 @@ class ReviewDAO(BaseDAO):
             return result.scalars().all()
         
     @classmethod
-    async def find_by_destination_id(cls, destination_id: int) -> List[SReviewOut]:
-        async with async_session_maker() as session:
-            # Join Review and User tables, select necessary columns
-            query = select(Review.id, Review.rating, Review.comment, Review.created_at, User.username) \
-                .join(User, Review.user_id == User.id) \
+    async def find_by_destination_id(cls, destination_id: int, session: AsyncSession | None = None):
+        """
+        Отзывы направления с именами авторов. Возвращает строки с полями
+        SReviewOut, которые отдаются в ответ без промежуточных объектов.
+        """
+        async with session_scope(session) as session:
+            query = (
+                select(Review.id, Review.rating, Review.comment, Review.created_at, User.username)
+                .join(User, Review.user_id == User.id)
                 .where(Review.destination_id == destination_id)
-
+            )
             result = await session.execute(query)
-            reviews = []
-            for row in result.all():
-                # Create SReviewOut objects from the query result
-                review = SReviewOut(
-                    id=row[0],
-                    rating=row[1],
-                    comment=row[2],
-                    created_at=row[3],
-                    username=row[4]  # Include username in SReviewOut
-                )
-                reviews.append(review)
-            return reviews
+            return result.all()
         
     @classmethod
-    async def count(cls, where_clause=None):
-        async with async_session_maker() as session:
+    async def count(cls, where_clause=None, session: AsyncSession | None = None):
+        async with session_scope(session) as session:
             query = select(func.count()).select_from(cls.model)
             if where_clause:
                 query = query.where(where_clause)
@@ -79,12 +151,22 @@ class ReviewDAO(BaseDAO):
             return result.scalar_one()
         
     @classmethod
-    async def get_average_rating(cls, destination_id: int):
-        async with async_session_maker() as session:
+    async def get_average_rating(cls, destination_id: int, session: AsyncSession | None = None):
+        async with session_scope(session) as session:
             query = (
-                select(func.avg(Review.rating).label("average_rating"))
-                .where(Review.destination_id == destination_id)
+                select(DestinationStats.avg_rating)
+                .where(DestinationStats.destination_id == destination_id)
             )
             result = await session.execute(query)
             return result.scalar_one_or_none()
-    
\ No newline at end of file
+
+    @classmethod
+    async def get_rating_distribution(cls, session: AsyncSession | None = None) -> dict[int, int]:
+        async with session_scope(session) as session:
+            query = (
+                select(Review.rating, func.count(Review.id))
+                .group_by(Review.rating)
+                .order_by(Review.rating)
+            )
+            result = await session.execute(query)
+            return {rating: count for rating, count in result.all()}
@@ -1,11 +1,22 @@
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.destinations.dao import DestinationDAO
+from app.dao.loader import Loaders, get_loaders
+from app.database import get_uow
+
+from app.destinations.dao import DestinationDAO, DestinationStatsDAO
 from app.reviews.dao import ReviewDAO
 from app.reviews.models import Review
-from app.reviews.schemas import SReviewCreate, SReviewUpdate
+from app.reviews.schemas import (
+    SDestinationReviews,
+    SReview,
+    SReviewCreate,
+    SReviewUpdate,
+    SUserReviews,
+)
+from app.schemas import SStatusMessage
 from app.users.dependencies import get_current_user
 from app.users.models import User
 
@@ -14,12 +25,13 @@ router = APIRouter(
     tags=["Отзывы"]
 )
 
-@router.post("")
+@router.post("", response_model=SStatusMessage)
 async def create_review(
     review_data: SReviewCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_uow)
 ):
-    destination = await DestinationDAO.find_by_id(review_data.destination_id)
+    destination = await DestinationDAO.find_by_id(review_data.destination_id, session=session)
     if not destination:
         raise HTTPException(
             status_code=404,
@@ -27,6 +39,7 @@ async def create_review(
         )
         
     existing_review = await ReviewDAO.find_one_or_none(
+        session=session,
         user_id=current_user.id, 
         destination_id=review_data.destination_id
     ) 
@@ -37,6 +50,7 @@ async def create_review(
         )
 
     new_review = await ReviewDAO.add(
+        session=session,
         user_id=current_user.id,
         destination_id=review_data.destination_id,
         rating=review_data.rating,
@@ -49,7 +63,7 @@ async def create_review(
         "message": "Отзыв успешно создан"
     }
 
-@router.get("/destination/{destination_id}")
+@router.get("/destination/{destination_id}", response_model=SDestinationReviews)
 async def get_destination_reviews(
     destination_id: int,
     page: int = 1,
@@ -65,8 +79,9 @@ async def get_destination_reviews(
         # Fetch reviews with user information using the DAO
         reviews = await ReviewDAO.find_by_destination_id(destination_id)  
 
-        total_reviews = await ReviewDAO.count(where_clause=Review.destination_id == destination_id)
-        avg_rating = await ReviewDAO.get_average_rating(destination_id) or 0
+        stats = await DestinationStatsDAO.find_by_destination_id(destination_id)
+        total_reviews = stats.review_count if stats else 0
+        avg_rating = (stats.avg_rating if stats else None) or 0
 
         return {
             "total": total_reviews,
@@ -79,18 +94,21 @@ async def get_destination_reviews(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching reviews: {e}")
 
-@router.get("/user")
+@router.get("/user", response_model=SUserReviews)
 async def get_user_reviews(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
 ):    
     reviews = await ReviewDAO.find_all(
         {"user_id": current_user.id},
         order_by=[desc(Review.created_at)]
     )
     
+    # Все направления загружаются одним запросом
+    destinations = await loaders[DestinationDAO].load_many(review.destination_id for review in reviews)
+    
     reviews_with_destinations = []
-    for review in reviews:
-        destination = await DestinationDAO.find_by_id(review.destination_id)
+    for review, destination in zip(reviews, destinations):
         reviews_with_destinations.append({
             "id": review.id,
             "rating": review.rating,
@@ -110,13 +128,14 @@ async def get_user_reviews(
     }
     
 
-@router.put("/{review_id}")
+@router.put("/{review_id}", response_model=SReview)
 async def update_review(
     review_id: int,
     review_data: SReviewUpdate,  # Use the schema here
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_uow)
 ):
-    review = await ReviewDAO.find_by_id(review_id)
+    review = await ReviewDAO.find_by_id(review_id, session=session)
     if not review:
         raise HTTPException(status_code=404, detail="Отзыв не найден")
 
@@ -130,18 +149,20 @@ async def update_review(
 
     updated_review = await ReviewDAO.update(
         review_id,
+        session=session,
         **update_data  # Pass update_data as keyword arguments
     )
 
     return updated_review
 
 
-@router.delete("/{review_id}")
+@router.delete("/{review_id}", response_model=SStatusMessage)
 async def delete_review(
     review_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_uow)
 ):
-    review = await ReviewDAO.find_by_id(review_id)
+    review = await ReviewDAO.find_by_id(review_id, session=session)
     if not review:
         raise HTTPException(
             status_code=404,
@@ -154,7 +175,7 @@ async def delete_review(
             detail="У вас нет прав на удаление этого отзыва"
         )
     
-    await ReviewDAO.delete(review_id)
+    await ReviewDAO.delete(review_id, session=session)
     
     return {
         "status": "success",
@@ -2,7 +2,7 @@ from datetime import date, datetime
 from typing import Optional
 from pydantic import BaseModel, EmailStr, Field, field_serializer
 
-from app.users.schemas import SUser
+from app.destinations.schemas import SDestinationBrief
 
 
 class SReviewCreate(BaseModel):
@@ -26,4 +26,43 @@ class SReviewOut(BaseModel):
     rating: int
     comment: str | None = None
     created_at: datetime
-    username: str  # Add username field
\ No newline at end of file
+    username: str  # Add username field
+
+    class Config:
+        from_attributes = True
+
+
+class SReview(BaseModel):
+    id: int
+    user_id: int
+    destination_id: int
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SDestinationReviews(BaseModel):
+    total: int
+    page: int
+    pages: int
+    average_rating: float
+    reviews: list[SReviewOut]
+
+
+class SUserReviewOut(BaseModel):
+    id: int
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+    destination: SDestinationBrief
+
+    class Config:
+        from_attributes = True
+
+
+class SUserReviews(BaseModel):
+    total: int
+    reviews: list[SUserReviewOut]
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class SMessage(BaseModel):
+    message: str
+
+
+class SStatusMessage(BaseModel):
+    status: str
+    message: str
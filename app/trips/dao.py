@@ -1,17 +1,110 @@
+from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from app.dao.base import BaseDAO
-from app.database import async_session_maker
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import session_scope
+from app.recommendations.engine import refresh_recommendations_on_commit
+from app.response_cache import invalidate_on_commit
+from app.destinations.dao import DestinationStatsDAO
 from app.destinations.models import Destination
 from app.trips.models import Trip
+from app.trips.schemas import TripStatus
+
+EXCLUSION_VIOLATION = "23P01"
+
 
 class TripDAO(BaseDAO):
     
     model = Trip
+
+    SHAPES = {
+        # Ответы API (TripResponse)
+        "full": (
+            Trip.id,
+            Trip.user_id,
+            Trip.destination_id,
+            Trip.start_date,
+            Trip.end_date,
+            Trip.budget,
+            Trip.status,
+        ),
+    }
+
+    # Поездки влияют на фильтр по среднему бюджету и на статистику
+    CACHE_TAGS = ("destinations:budget", "statistics")
+
+    @staticmethod
+    def is_overlap_error(error: IntegrityError) -> bool:
+        """
+        Нарушение ограничения trips_no_overlap (пересечение дат поездок).
+        """
+        return getattr(error.orig, "sqlstate", None) == EXCLUSION_VIOLATION
+
+    @classmethod
+    async def add(cls, session: AsyncSession | None = None, **data):
+        async with session_scope(session, commit=True) as session:
+            query = (
+                insert(cls.model)
+                .values(**data)
+                .returning(*cls.SHAPES["full"])
+            )
+            trip = (await session.execute(query)).one()
+            invalidate_on_commit(session, *cls.CACHE_TAGS)
+            refresh_recommendations_on_commit(session, trip.user_id)
+            await DestinationStatsDAO.apply_delta(
+                session, trip.destination_id, **DestinationStatsDAO.trip_delta(trip.budget)
+            )
+            return trip
+
+    @classmethod
+    async def update(cls, id: int, session: AsyncSession | None = None, **data):
+        async with session_scope(session, commit=True) as session:
+            old = (await session.execute(
+                select(cls.model.destination_id, cls.model.budget)
+                .where(cls.model.id == id)
+                .with_for_update()
+            )).one_or_none()
+            query = (
+                update(cls.model)
+                .where(cls.model.id == id)
+                .values(**data)
+                .returning(cls.model)
+            )
+            result = await session.execute(query)
+            trip = result.scalar_one_or_none()
+            if old and trip and (old.destination_id, old.budget) != (trip.destination_id, trip.budget):
+                invalidate_on_commit(session, *cls.CACHE_TAGS)
+                await DestinationStatsDAO.apply_delta(
+                    session, old.destination_id, **DestinationStatsDAO.trip_delta(old.budget, sign=-1)
+                )
+                await DestinationStatsDAO.apply_delta(
+                    session, trip.destination_id, **DestinationStatsDAO.trip_delta(trip.budget)
+                )
+            if old and trip and old.destination_id != trip.destination_id:
+                refresh_recommendations_on_commit(session, trip.user_id)
+            return trip
+
+    @classmethod
+    async def delete(cls, id, session: AsyncSession | None = None):
+        async with session_scope(session, commit=True) as session:
+            query = (
+                delete(cls.model)
+                .where(cls.model.id == id)
+                .returning(cls.model.user_id, cls.model.destination_id, cls.model.budget)
+            )
+            trip = (await session.execute(query)).one_or_none()
+            if trip:
+                invalidate_on_commit(session, *cls.CACHE_TAGS)
+                refresh_recommendations_on_commit(session, trip.user_id)
+                await DestinationStatsDAO.apply_delta(
+                    session, trip.destination_id, **DestinationStatsDAO.trip_delta(trip.budget, sign=-1)
+                )
     
     @classmethod
-    async def get_destination_name_by_trip_id(cls, trip_id: int) -> Optional[str]:
-        async with async_session_maker() as session:
+    async def get_destination_name_by_trip_id(cls, trip_id: int, session: AsyncSession | None = None) -> Optional[str]:
+        async with session_scope(session) as session:
             query = (
                 select(Destination.name)
                 .join(Trip, Trip.destination_id == Destination.id)
@@ -19,4 +112,42 @@ class TripDAO(BaseDAO):
             )
             result = await session.execute(query)
             destination_name = result.scalar_one_or_none()
-            return destination_name
\ No newline at end of file
+            return destination_name
+
+    @classmethod
+    async def count_by_month(cls, since: datetime, session: AsyncSession | None = None) -> dict[int, int]:
+        async with session_scope(session) as session:
+            month = func.extract("month", cls.model.start_date)
+            query = (
+                select(month, func.count(cls.model.id))
+                .filter(cls.model.start_date >= since)
+                .group_by(month)
+                .order_by(month)
+            )
+            result = await session.execute(query)
+            return {int(month): count for month, count in result.all()}
+
+    @classmethod
+    async def update_statuses(cls, now: datetime | None = None, session: AsyncSession | None = None) -> dict:
+        """
+        Переводит поездки planned -> in_progress -> completed по датам двумя
+        UPDATE на всю таблицу (по частичным индексам). Даты сравниваются
+        с текущим временем UTC, как при создании поездки в create_trip.
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        async with session_scope(session, commit=True) as session:
+            completed = await session.execute(
+                update(cls.model)
+                .where(cls.model.status != TripStatus.PAST, cls.model.end_date < now)
+                .values(status=TripStatus.PAST)
+            )
+            started = await session.execute(
+                update(cls.model)
+                .where(
+                    cls.model.status == TripStatus.FUTURE,
+                    cls.model.start_date <= now,
+                    cls.model.end_date >= now,
+                )
+                .values(status=TripStatus.CURRENT)
+            )
+            return {"completed": completed.rowcount, "started": started.rowcount}
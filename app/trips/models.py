@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
-from sqlalchemy import DateTime, ForeignKey, Numeric, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String, func, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -19,5 +20,22 @@ class Trip(Base):
     budget: Mapped[Optional[float]] = mapped_column(Numeric(10, 2))
     status: Mapped[str] = mapped_column(String(50))
     
+    # Поездки одного пользователя не могут пересекаться по датам (границы включительно).
+    # GiST-индекс ограничения заодно служит для поиска пересечений.
+    __table_args__ = (
+        ExcludeConstraint(
+            ("user_id", "="),
+            (text("tsrange(start_date, end_date, '[]')"), "&&"),
+            name="trips_no_overlap",
+            using="gist",
+        ),
+        # Фильтр поездок пользователя по статусу (GET /trips?status=)
+        Index("ix_trips_user_id_status", "user_id", "status"),
+        # Переходы статусов по датам (TripDAO.update_statuses) читают только
+        # ещё не завершённые поездки
+        Index("ix_trips_planned_start_date", "start_date", postgresql_where=text("status = 'planned'")),
+        Index("ix_trips_active_end_date", "end_date", postgresql_where=text("status <> 'completed'")),
+    )
+    
     user = relationship("User", back_populates="trips")
     destination = relationship("Destination", back_populates="trips")
\ No newline at end of file
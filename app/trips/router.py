@@ -1,8 +1,14 @@
-from datetime import date, datetime, timezone
+from datetime import datetime, timezone
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_uow
+from app.exceptions import TripDatesOverlapException
 
 from app.trips.dao import TripDAO
+from app.schemas import SMessage
 from app.trips.schemas import STripCreate, STripUpdate, TripResponse, TripStatus
 from app.users.dependencies import get_current_user
 from app.users.models import User
@@ -13,10 +19,11 @@ router = APIRouter(
 )
 
 
-@router.post("")
+@router.post("", response_model=TripResponse)
 async def create_trip(
     trip_data: STripCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_uow)
 ):
     start_date = trip_data.start_date if trip_data.start_date.tzinfo else trip_data.start_date.replace(tzinfo=timezone.utc)
     end_date = trip_data.end_date if trip_data.end_date.tzinfo else trip_data.end_date.replace(tzinfo=timezone.utc)
@@ -27,17 +34,6 @@ async def create_trip(
             detail="Дата начала не может быть позже даты окончания"
         )
     
-    existing_trips = await TripDAO.find_all(user_id=current_user.id)
-    for trip in existing_trips:
-        trip_start = trip.start_date if trip.start_date.tzinfo else trip.start_date.replace(tzinfo=timezone.utc)
-        trip_end = trip.end_date if trip.end_date.tzinfo else trip.end_date.replace(tzinfo=timezone.utc)
-        
-        if (start_date <= trip_end and end_date >= trip_start):
-            raise HTTPException(
-                status_code=400,
-                detail="Даты пересекаются с существующим путешествием"
-            )
-    
     now = datetime.now(timezone.utc)
     if end_date < now:
         status = TripStatus.PAST
@@ -46,49 +42,44 @@ async def create_trip(
     else:
         status = TripStatus.CURRENT
     
-    new_trip = await TripDAO.add(
-        user_id=current_user.id,
-        destination_id=trip_data.destination_id,
-        start_date=start_date.replace(tzinfo=None),
-        end_date=end_date.replace(tzinfo=None),
-        budget=trip_data.budget,
-        status=status
-    )
+    # Пересечение дат проверяет ограничение trips_no_overlap в БД
+    try:
+        new_trip = await TripDAO.add(
+            session=session,
+            user_id=current_user.id,
+            destination_id=trip_data.destination_id,
+            start_date=start_date.replace(tzinfo=None),
+            end_date=end_date.replace(tzinfo=None),
+            budget=trip_data.budget,
+            status=status
+        )
+    except IntegrityError as e:
+        if TripDAO.is_overlap_error(e):
+            raise TripDatesOverlapException
+        raise
     
     return new_trip
     
     
 
-@router.get("")
+@router.get("", response_model=list[TripResponse])
 async def get_user_trips(
-    status: str,
+    status: Optional[str] = None,
     current_user: User = Depends(get_current_user),
 ):
-    trips = await TripDAO.find_all(user_id=current_user.id)
-    
+    # Статусы поддерживает фоновое задание (TripDAO.update_statuses),
+    # поэтому фильтр — условие по индексу (user_id, status)
     if status:
-        today = date.today()
-        filtered_trips = []
-        
-        for trip in trips:
-            if status == TripStatus.FUTURE and trip.start_date > today:
-                filtered_trips.append(trip)
-            elif status == TripStatus.PAST and trip.end_date < today:
-                filtered_trips.append(trip)
-            elif status == TripStatus.CURRENT and trip.start_date <= today <= trip.end_date:
-                filtered_trips.append(trip)
-        
-        return filtered_trips
-    
-    return trips
+        return await TripDAO.find_all(shape="full", user_id=current_user.id, status=status)
+    return await TripDAO.find_all(shape="full", user_id=current_user.id)
     
 
-@router.get("/{trip_id}")
+@router.get("/{trip_id}", response_model=TripResponse)
 async def get_trip(
     trip_id: int,
     current_user: User = Depends(get_current_user)
 ):
-    trip = await TripDAO.find_by_id(trip_id)
+    trip = await TripDAO.find_by_id(trip_id, shape="full")
     
     if not trip:
         raise HTTPException(
@@ -105,13 +96,14 @@ async def get_trip(
     return trip
     
 
-@router.put("/{trip_id}")
+@router.put("/{trip_id}", response_model=TripResponse)
 async def update_trip(
     trip_id: int,
     trip_data: STripUpdate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_uow)
 ):
-    existing_trip = await TripDAO.find_by_id(trip_id)
+    existing_trip = await TripDAO.find_by_id(trip_id, session=session)
     if not existing_trip:
         raise HTTPException(status_code=404, detail="Путешествие не найдено")
 
@@ -131,16 +123,22 @@ async def update_trip(
         if existing_trip.start_date > update_data["end_date"]:
             raise HTTPException(status_code=400, detail="Дата начала не может быть позже даты окончания")
 
-    updated_trip = await TripDAO.update(trip_id, **update_data)
+    try:
+        updated_trip = await TripDAO.update(trip_id, session=session, **update_data)
+    except IntegrityError as e:
+        if TripDAO.is_overlap_error(e):
+            raise TripDatesOverlapException
+        raise
 
     return updated_trip
 
-@router.delete("/{trip_id}")
+@router.delete("/{trip_id}", response_model=SMessage)
 async def delete_trip(
     trip_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_uow)
 ):
-    trip = await TripDAO.find_by_id(trip_id)
+    trip = await TripDAO.find_by_id(trip_id, session=session)
     
     if not trip:
         raise HTTPException(
@@ -154,7 +152,7 @@ async def delete_trip(
             detail="Нет прав для удаления этого путешествия"
         )
     
-    await TripDAO.delete(trip_id)
+    await TripDAO.delete(trip_id, session=session)
     
     return {"message": "Путешествие успешно удалено"}
     
@@ -29,10 +29,12 @@ class STripUpdate(BaseModel):
         
 class TripResponse(BaseModel):
     id: int
+    user_id: int
     destination_id: int
     start_date: datetime
     end_date: datetime
     budget: Optional[float] = None
+    status: str
     
     
     class Config:
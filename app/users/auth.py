@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 from passlib.context import CryptContext
@@ -6,14 +8,40 @@ from pydantic import EmailStr
 from app.users.dao import UserDAO
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds == max_rounds: хэш с другой стоимостью считается устаревшим
+# и перехэшируется при следующем входе пользователя
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
+# bcrypt отпускает GIL, поэтому потоков достаточно; число потоков
+# ограничивает, сколько хэшей считается одновременно
+hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    thread_name_prefix="password-hashing",
+)
 
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def _run_hashing(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hashing_executor, func, *args)
+
+
+async def get_password_hash(password: str) -> str:
+    return await _run_hashing(pwd_context.hash, password)
+
+async def verify_password(plain_password, hashed_password) -> bool:
+    return await _run_hashing(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password(plain_password, hashed_password) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль и, если хэш посчитан с другой стоимостью, возвращает новый хэш.
+    """
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -27,6 +55,11 @@ def create_access_token(data: dict) -> str:
 
 async def authenticate_user(email: EmailStr, password: str):
     user = await UserDAO.find_one_or_none(email=email)
-    if not user and verify_password(password, user.password):
+    if not user:
+        return None
+    is_valid, new_hash = await verify_and_update_password(password, user.password_hash)
+    if not is_valid:
         return None
+    if new_hash:
+        await UserDAO.update(user.id, password_hash=new_hash)
     return user
\ No newline at end of file
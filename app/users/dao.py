@@ -1,8 +1,60 @@
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import TTLCache
+from app.config import settings
 from app.dao.base import BaseDAO
-from app.database import async_session_maker
+from app.database import after_commit, primary_reads, session_scope
+from app.response_cache import invalidate_on_commit
 from app.users.models import User
 
+# Пользователи для get_current_user. Сбрасывается при изменении и удалении
+# пользователя; в других воркерах запись живёт не дольше USER_CACHE_TTL.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+# Счётчик сбросов записи пользователя: запись, прочитанная до сброса,
+# в кэш не попадает
+_user_generations: dict[int, int] = {}
+
+
+def _invalidate_user(user_id: int):
+    _user_generations[user_id] = _user_generations.get(user_id, 0) + 1
+    user_cache.pop(user_id)
+
+
 class UserDAO(BaseDAO):
     
-    model = User
\ No newline at end of file
+    model = User
+
+    SHAPES = {
+        "summary": (User.id, User.username, User.email, User.role),
+        # Выгрузка для администраторов: всё, кроме хэша пароля
+        "export": (User.id, User.username, User.email, User.role, User.registration_date),
+        # Текущий пользователь (get_current_user): неизменяемая строка для user_cache
+        "current": (User.id, User.username, User.email, User.role, User.registration_date),
+    }
+
+    @classmethod
+    async def find_by_id_cached(cls, user_id: int):
+        user = user_cache.get(user_id)
+        if user is None:
+            generation = _user_generations.get(user_id, 0)
+            # С primary: реплика может ещё не содержать только что изменённую запись
+            with primary_reads():
+                user = await cls.find_by_id(user_id, shape="current")
+            if user and _user_generations.get(user_id, 0) == generation:
+                user_cache.set(user_id, user)
+        return user
+
+    @classmethod
+    async def update(cls, id: int, session: AsyncSession | None = None, **data):
+        async with session_scope(session, commit=True) as session:
+            after_commit(session, lambda: _invalidate_user(id))
+            # Имена пользователей выводятся в списках отзывов
+            invalidate_on_commit(session, "reviews")
+            return await super().update(id, session=session, **data)
+
+    @classmethod
+    async def delete(cls, id, session: AsyncSession | None = None):
+        async with session_scope(session, commit=True) as session:
+            after_commit(session, lambda: _invalidate_user(id))
+            invalidate_on_commit(session, "reviews")
+            await super().delete(id, session=session)
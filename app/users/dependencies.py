@@ -28,7 +28,7 @@ async def get_current_user(token: str = Depends(get_token)):
     user_id: str = payload.get("sub")
     if not user_id:
         raise UserIsNotPresentException
-    user = await UserDAO.find_by_id(int(user_id))
+    user = await UserDAO.find_by_id_cached(int(user_id))
     if not user:
         raise UserIsNotPresentException
     return user
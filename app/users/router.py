@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
+from app.rate_limit.limiter import auth_limiter, client_ip
 from app.users.auth import authenticate_user, create_access_token, get_password_hash, verify_password
 from app.users.dao import UserDAO
 from app.users.dependencies import get_current_admin_user, get_current_user
 from app.users.models import User
-from app.users.schemas import SUser, SUserAuth, SUserRegister, SUserUpdate
+from app.users.schemas import SToken, SUser, SUserAuth, SUserRegister, SUserUpdate
+from app.schemas import SMessage
 from app.exceptions import UserAlreadyExistsException, IncorrectEmailOrPasswordException
 
 router = APIRouter(
@@ -13,39 +15,47 @@ router = APIRouter(
 )
 
 
-@router.post("/register")
-async def register_user(user_data: SUserRegister):
+@router.post("/register", response_model=SUser)
+async def register_user(request: Request, user_data: SUserRegister):
+    # Лимиты проверяются до запросов к БД и хеширования пароля
+    await auth_limiter.hit("register_ip", client_ip(request))
+    await auth_limiter.hit("register_email", user_data.email.lower())
     existing_user_email = await UserDAO.find_one_or_none(email=user_data.email)
     if existing_user_email:
         raise UserAlreadyExistsException
     existing_username = await UserDAO.find_one_or_none(username=user_data.username)
     if existing_username:
         raise UserAlreadyExistsException
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     await UserDAO.add(username=user_data.username, email=user_data.email, password_hash=hashed_password, role=user_data.role)
     new_user = await UserDAO.find_one_or_none(email=user_data.email)  
     
     return new_user
     
 
-@router.post("/login")
-async def login_user(response: Response, user_data: SUserAuth):
+@router.post("/login", response_model=SToken)
+async def login_user(request: Request, response: Response, user_data: SUserAuth):
+    email = user_data.email.lower()
+    await auth_limiter.hit("login_ip", client_ip(request))
+    await auth_limiter.hit("login_email", email)
     user = await authenticate_user(user_data.email, user_data.password)
     if not user:
         raise IncorrectEmailOrPasswordException
+    # Успешный вход не должен расходовать лимит неудачных попыток на почту
+    await auth_limiter.reset("login_email", email)
     access_token = create_access_token({"sub": str(user.id)})
     response.set_cookie("travels_access_token", access_token, httponly=True)
     return {"access_token": access_token}
 
-@router.post("/logout")
+@router.post("/logout", response_model=None)
 async def logout_user(response: Response):
     response.delete_cookie("travels_access_token")
     
-@router.get("/me")
+@router.get("/me", response_model=SUser)
 async def read_users_me(user: User = Depends(get_current_user)):
     return user
 
-@router.put("/me")
+@router.put("/me", response_model=SUser)
 async def update_users_me(
     user_data: SUserUpdate,
     current_user: User = Depends(get_current_user)
@@ -65,7 +75,7 @@ async def update_users_me(
         update_data["email"] = user_data.email
         
     if user_data.password is not None:
-        update_data["password_hash"] = get_password_hash(user_data.password)
+        update_data["password_hash"] = await get_password_hash(user_data.password)
     
     if update_data:
         await UserDAO.update(current_user.id, **update_data)
@@ -76,7 +86,7 @@ async def update_users_me(
 async def get_user_by_id(user_id: int, user: User = Depends(get_current_admin_user)) -> SUser:
     return await UserDAO.find_by_id(user_id)
     
-@router.get("/users/{user_id}")
+@router.get("/users/{user_id}", response_model=SUser)
 async def get_user_by_id(
     user_id: int,
     current_user: User = Depends(get_current_admin_user)  # Только для администраторов
@@ -90,7 +100,7 @@ async def get_user_by_id(
     return user
 
 
-@router.put("/users/{user_id}")
+@router.put("/users/{user_id}", response_model=SUser)
 async def update_user(
     user_id: int,
     user_data: SUserUpdate,  #  Схема данных для обновления пользователя
@@ -113,7 +123,7 @@ async def update_user(
         update_data["email"] = user_data.email
         
     if user_data.password is not None:
-        update_data["password_hash"] = get_password_hash(user_data.password)
+        update_data["password_hash"] = await get_password_hash(user_data.password)
     
     if update_data:
         user = await UserDAO.update(user_id, **update_data)
@@ -125,7 +135,7 @@ async def update_user(
     
     return user
 
-@router.delete("/users/{user_id}")
+@router.delete("/users/{user_id}", response_model=SMessage)
 async def delete_user(
     user_id: int,
     current_user: User = Depends(get_current_admin_user)
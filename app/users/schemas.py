@@ -25,7 +25,6 @@ class SUser(BaseModel):
     id: int
     username: str
     email: str
-    password_hash: str
     role: str
     registration_date: datetime
     
@@ -40,3 +39,7 @@ class SUserUpdate(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class SToken(BaseModel):
+    access_token: str